@@ -0,0 +1,61 @@
+"""
+Collection iteration benchmark
+
+Times a full iteration of collections of 1k, 10k and 100k elements with the current
+iterator and with the one it replaced, which rebuilt the key list on every step.
+The old iterator is only run for its first steps on the larger collections, its total
+is extrapolated from those (marked with ~).
+
+Run from the repository root:
+    python -m src.benchmarks.collectionBenchmark
+"""
+from src.repository.collection import Collection
+
+import time
+
+
+class OldColIterator:
+    """
+    The iterator Collection used before, O(N) per step
+    """
+    def __init__(self, col):
+        self._collection = col
+        self._pos = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pos == len(list(self._collection._data.keys())):
+            raise StopIteration()
+        self._pos += 1
+        return self._collection._data[list(self._collection._data.keys())[self._pos-1]]
+
+
+def time_iteration(it, steps=None):
+    start = time.perf_counter()
+    n = 0
+    for _ in it:
+        n += 1
+        if n == steps:
+            break
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'elements':>10} {'old iterator':>14} {'new iterator':>14} {'snapshot':>14}")
+    for size in (1000, 10000, 100000):
+        c = Collection()
+        for i in range(size):
+            c.add(str(i), i)
+
+        steps = min(size, 2000)
+        old = time_iteration(OldColIterator(c), steps) * size / steps
+        new = time_iteration(c)
+        snap = time_iteration(c.snapshot())
+        mark = "~" if steps < size else " "
+        print(f"{size:>10} {mark}{old:>12.4f}s {new:>13.4f}s {snap:>13.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Domain objects benchmark
+
+Loads rentals from their text form, once through the validating constructor and once through
+the trusted path used by the repositories, and measures the memory taken per rental against
+the same fields held by an object with a __dict__, with tracemalloc.
+
+Run from the repository root:
+    python -m src.benchmarks.domainBenchmark [rentals]
+"""
+from src.domain.rental import Rental
+from src.benchmarks.rentalTableBenchmark import make_rentals
+
+import datetime
+import sys
+import time
+import tracemalloc
+
+
+class _DictRental:
+    """
+    Rental with the attributes in a __dict__, as before the slots
+    """
+    def __init__(self, r):
+        self._Rental__id = r.id
+        self._movie_id = str(r.movie_id)
+        self._client_id = str(r.client_id)
+        self._rented_date = r.rented_date
+        self._due_date = r.due_date
+        self._returned_date = r.returned_date
+
+
+def validated(line):
+    s = line.strip().split(",")
+    return Rental(s[0], s[1], s[2], datetime.datetime.strptime(s[3], '%d/%m/%Y'),
+                  datetime.datetime.strptime(s[4], '%d/%m/%Y'), datetime.datetime.strptime(s[5], '%d/%m/%Y'))
+
+
+def measure(build):
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    lines = [Rental.get_string_form(r) + "\n" for r in make_rentals(n)]
+    print(f"{n} rentals")
+
+    for name, load in (("validated", validated), ("trusted", Rental.get_from_string)):
+        start = time.perf_counter()
+        rentals = [load(line) for line in lines]
+        elapsed = time.perf_counter() - start
+        print(f"{name:10} {elapsed:8.2f} s {n / elapsed:10.0f} rentals/s")
+
+    # the id strings are made by the loads, as they would be by a repository
+    dict_size = measure(lambda: [_DictRental(Rental.get_from_string(line)) for line in lines])
+    slots_size = measure(lambda: [Rental.get_from_string(line) for line in lines])
+    print(f"__dict__ objects: {dict_size / n:8.1f} bytes per rental")
+    print(f"__slots__ objects:{slots_size / n:8.1f} bytes per rental")
+
+
+if __name__ == "__main__":
+    main()
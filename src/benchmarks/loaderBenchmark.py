@@ -0,0 +1,61 @@
+"""
+Text loader benchmark
+
+Times the cold load of a rentals file, as it was done before (readlines and strptime through
+the validating constructor for every line) and with the chunked loader used by the text file
+repositories, with and without building the repository around it.
+
+Run from the repository root:
+    python -m src.benchmarks.loaderBenchmark [rentals]
+"""
+from src.domain.rental import Rental
+from src.domain import rental
+from src.repository.fileRepository import FileRepository
+from src.repository.textLoader import read_elements
+from src.benchmarks.rentalTableBenchmark import make_rentals
+
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+
+def line_by_line(file_name):
+    with open(file_name, "rt") as f:
+        lines = f.readlines()
+    rentals = []
+    for line in lines:
+        if line != "\n":
+            s = line.strip().split(",")
+            rentals.append(Rental(s[0], s[1], s[2], datetime.datetime.strptime(s[3], '%d/%m/%Y'),
+                                  datetime.datetime.strptime(s[4], '%d/%m/%Y'),
+                                  datetime.datetime.strptime(s[5], '%d/%m/%Y')))
+    return rentals
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, "rentals.txt")
+        with open(name, "wt") as f:
+            f.writelines(Rental.get_string_form(r) + "\n" for r in make_rentals(n))
+
+        print(f"{n} rentals")
+        timings = []
+        for label, load in (("line by line", line_by_line),
+                            ("chunked", lambda file_name: list(read_elements(file_name, Rental))),
+                            ("FileRepository", lambda file_name: FileRepository(f'"{file_name}"', Rental, "writeback"))):
+            # every load starts without parsed dates
+            rental._DATES.clear()
+            start = time.perf_counter()
+            loaded = load(name)
+            timings.append(time.perf_counter() - start)
+            print(f"{label:15} {timings[-1]:8.2f} s {timings[0] / timings[-1]:6.1f}x")
+            if isinstance(loaded, FileRepository):
+                loaded.close()
+            del loaded
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Partition-parallel statistics benchmark
+
+Writes the rentals to a text file and times StatisticsService.refresh() over a direct mode
+FileRepository, the file split into byte ranges read by 1 to N worker processes, N being
+the number of cores unless given. The speedup is against 1 worker, which runs in-process.
+
+Run from the repository root:
+    python -m src.benchmarks.parallelStatisticsBenchmark [rentals] [max workers]
+"""
+from src.domain.rental import Rental
+from src.repository.fileRepository import FileRepository
+from src.services.statisticsService import StatisticsService
+from src.benchmarks.rentalTableBenchmark import make_rentals
+from src.benchmarks.statisticsBenchmark import _Service
+
+import os
+import sys
+import tempfile
+import time
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "rentals.txt")
+        with open(path, "wt") as f:
+            f.writelines(Rental.get_string_form(r) + "\n" for r in make_rentals(n))
+        rentals = _Service(FileRepository(f'"{path}"', Rental))
+
+        print(f"{n} rentals, {os.cpu_count()} cores")
+        base = None
+        for workers in range(1, max_workers + 1):
+            stats = StatisticsService(None, None, rentals, workers)
+            start = time.perf_counter()
+            stats.refresh()
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print(f"{workers:3} workers {elapsed:8.3f} s {base / elapsed:6.2f}x  {len(stats.late_rentals())} late")
+
+
+if __name__ == "__main__":
+    main()
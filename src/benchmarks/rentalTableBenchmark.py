@@ -0,0 +1,64 @@
+"""
+RentalTable memory benchmark
+
+Measures the memory taken per rental by Rental objects held in a Repository and by the
+same rentals held in a RentalTable, with tracemalloc.
+
+Run from the repository root:
+    python -m src.benchmarks.rentalTableBenchmark [rentals]
+"""
+from src.domain.rental import Rental
+from src.repository.repository import Repository
+from src.repository.rentalTable import RentalTable
+
+import datetime
+import random
+import sys
+import tracemalloc
+
+
+def make_rentals(n):
+    random.seed(1)
+    start = datetime.datetime(2005, 1, 1)
+    rentals = []
+    for i in range(n):
+        rented = start + datetime.timedelta(days=random.randint(0, 5000))
+        due = rented + datetime.timedelta(days=random.randint(1, 30))
+        returned = rented + datetime.timedelta(days=random.randint(0, 40)) if random.random() < 0.9 \
+            else datetime.datetime.min
+        rentals.append(Rental(i, random.randint(1, 5000), random.randint(1, 20000), rented, due, returned))
+    return rentals
+
+
+def measure(build):
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    def objects():
+        r = Repository()
+        r.add_many(make_rentals(n))
+        return r
+
+    def table():
+        t = RentalTable()
+        for rental in make_rentals(n):
+            t.add(rental)
+        return t
+
+    objects_size = measure(objects)
+    table_size = measure(table)
+    print(f"{n} rentals")
+    print(f"Rental objects: {objects_size / n:8.1f} bytes per rental")
+    print(f"RentalTable:    {table_size / n:8.1f} bytes per rental")
+
+
+if __name__ == "__main__":
+    main()
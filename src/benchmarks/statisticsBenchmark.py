@@ -0,0 +1,64 @@
+"""
+StatisticsService benchmark
+
+Times the three statistics reports for 50000 movies and 20000 clients: the top 10 of the
+leaderboards kept by RentalAggregates and the late rentals read from the DueDateIndex.
+
+Run from the repository root:
+    python -m src.benchmarks.statisticsBenchmark [rentals]
+"""
+from src.domain.movie import Movie
+from src.domain.client import Client
+from src.repository.repository import Repository
+from src.repository.rentalAggregates import RentalAggregates
+from src.repository.dueDateIndex import DueDateIndex
+from src.services.statisticsService import StatisticsService
+from src.benchmarks.rentalTableBenchmark import make_rentals
+
+import sys
+import time
+
+
+class _Service:
+    """
+    Stand-in for a service, holding a repository
+    """
+    def __init__(self, data):
+        self.data = data
+
+
+class _RentalService(_Service):
+    """
+    Stand-in for the rental service, with the structures the statistics read
+    """
+    def __init__(self, data):
+        super().__init__(data)
+        self.aggregates = RentalAggregates()
+        data.attach(self.aggregates)
+        self.due = DueDateIndex()
+        data.attach(self.due)
+
+    def get_passed_rentals(self, date):
+        return self.due.overdue(date)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    movies = Repository()
+    movies.add_many(Movie(i, f"Movie {i}", "A movie", "Drama") for i in range(1, 50001))
+    clients = Repository()
+    clients.add_many(Client(i, f"Client {i}") for i in range(1, 20001))
+    rentals = Repository()
+    rentals.add_many(make_rentals(n))
+
+    print(f"{n} rentals")
+    stats = StatisticsService(_Service(movies), _Service(clients), _RentalService(rentals))
+    for report, args in ((stats.most_rented_movies, (10,)), (stats.most_active_clients, (10,)),
+                         (stats.late_rentals, ())):
+        start = time.perf_counter()
+        result = report(*args)
+        print(f"{report.__name__:20} {len(result):8} rows {time.perf_counter() - start:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
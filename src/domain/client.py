@@ -1,7 +1,18 @@
-class Client:
+try:
+    from src.domain.slotted import Slotted
+except ImportError:
+    # imported from the domain directory, as by the domain tests
+    from slotted import Slotted
+
+
+class Client(Slotted):
     """
     Class for the clients
     """
+    __slots__ = ("__id", "_name")
+    # fields in the order of the string and row forms
+    FIELDS = ("id", "name")
+
     def __init__(self, _id, name):
         """
         Constructor
@@ -13,6 +24,19 @@ class Client:
         self.__id = str(_id)
         self._name = name
 
+    @staticmethod
+    def trusted(_id, name):
+        """
+        Constructor for clients already validated, such as the ones read back from a repository
+        :param _id: the id, a string
+        :param name: the name of the client
+        :return: the client
+        """
+        c = Client.__new__(Client)
+        c.__id = _id
+        c._name = name
+        return c
+
     def __str__(self):
         """
         String conversion
@@ -25,13 +49,31 @@ class Client:
     @staticmethod
     def get_from_string(st):
         s = st.strip().split(",")
-        return Client(s[0], s[1])
+        return Client.trusted(s[0], s[1])
+
+    @staticmethod
+    def get_many_from_strings(lines):
+        """
+        Clients from their string forms, as a batch
+        :param lines: the string forms
+        :return: list of clients
+        """
+        trusted = Client.trusted
+        return [trusted(s[0], s[1]) for s in (line.strip().split(",") for line in lines)]
 
     @staticmethod
     def get_string_form(obj):
         s = f"{obj.id},{obj.name}"
         return s
 
+    @staticmethod
+    def get_from_row(row):
+        return Client.trusted(row[0], row[1])
+
+    @staticmethod
+    def get_row_form(obj):
+        return obj.id, obj.name
+
 
     """
     Getters and Setters
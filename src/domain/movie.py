@@ -1,7 +1,20 @@
-class Movie:
+import sys
+
+try:
+    from src.domain.slotted import Slotted
+except ImportError:
+    # imported from the domain directory, as by the domain tests
+    from slotted import Slotted
+
+
+class Movie(Slotted):
     """
     Class for the movies
     """
+    __slots__ = ("__id", "_title", "_description", "_genre")
+    # fields in the order of the string and row forms
+    FIELDS = ("id", "title", "description", "genre")
+
     def __init__(self, _id, title, desc, genre):
         """
         Constructor for a new movie
@@ -18,7 +31,25 @@ class Movie:
 
         self._title = title
         self._description = desc
-        self._genre = genre
+        # few distinct genres, every movie shares one of their strings
+        self._genre = sys.intern(genre)
+
+    @staticmethod
+    def trusted(_id, title, desc, genre):
+        """
+        Constructor for movies already validated, such as the ones read back from a repository
+        :param _id: the id, a string
+        :param title: title of the movie
+        :param desc: description of the movie
+        :param genre: genre of the movie
+        :return: the movie
+        """
+        m = Movie.__new__(Movie)
+        m.__id = _id
+        m._title = title
+        m._description = desc
+        m._genre = sys.intern(genre)
+        return m
 
     def __str__(self):
         """
@@ -63,7 +94,7 @@ class Movie:
     @genre.setter
     def genre(self, value):
         Movie._validate_genre(value)
-        self._genre = value
+        self._genre = sys.intern(value)
 
     @staticmethod
     def _validate_title(value):
@@ -89,9 +120,27 @@ class Movie:
     @staticmethod
     def get_from_string(st):
         s = st.strip().split(",")
-        return Movie(s[0], s[1], s[2], s[3])
+        return Movie.trusted(s[0], s[1], s[2], s[3])
+
+    @staticmethod
+    def get_many_from_strings(lines):
+        """
+        Movies from their string forms, as a batch
+        :param lines: the string forms
+        :return: list of movies
+        """
+        trusted = Movie.trusted
+        return [trusted(s[0], s[1], s[2], s[3]) for s in (line.strip().split(",") for line in lines)]
 
     @staticmethod
     def get_string_form(obj):
         s = f"{obj.id},{obj.title},{obj.description},{obj.genre}"
         return s
+
+    @staticmethod
+    def get_from_row(row):
+        return Movie.trusted(row[0], row[1], row[2], row[3])
+
+    @staticmethod
+    def get_row_form(obj):
+        return obj.id, obj.title, obj.description, obj.genre
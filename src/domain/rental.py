@@ -1,7 +1,25 @@
 import datetime
+import sys
 
+try:
+    from src.domain.slotted import Slotted
+except ImportError:
+    # imported from the domain directory, as by the domain tests
+    from slotted import Slotted
+
+
+_DATES = {}
+"""
+Dates already parsed from their DD/MM/YYYY form, rentals share few distinct dates
+"""
+_DATES_LIMIT = 1 << 16
+
+
+class Rental(Slotted):
+    __slots__ = ("__id", "_movie_id", "_client_id", "_rented_date", "_due_date", "_returned_date")
+    # fields in the order of the string and row forms
+    FIELDS = ("id", "movie_id", "client_id", "rented_date", "due_date", "returned_date")
 
-class Rental:
     def __init__(self, _id, movie_id, client_id, rented_date, due_date, returned_date):
         Rental._validate_rented_date(rented_date)
         Rental._validate_due_date(due_date)
@@ -11,12 +29,34 @@ class Rental:
             raise ValueError("Invalid dates")
 
         self.__id = str(_id)
-        self._movie_id = str(movie_id)
-        self._client_id = str(client_id)
+        # a movie or a client has many rentals, they all share the string of its id
+        self._movie_id = sys.intern(str(movie_id))
+        self._client_id = sys.intern(str(client_id))
         self._rented_date = rented_date
         self._due_date = due_date
         self._returned_date = returned_date
 
+    @staticmethod
+    def trusted(_id, movie_id, client_id, rented_date, due_date, returned_date):
+        """
+        Constructor for rentals already validated, such as the ones read back from a repository
+        :param _id: the id, a string
+        :param movie_id: id of the movie, a string
+        :param client_id: id of the client, a string
+        :param rented_date: date the movie was rented on
+        :param due_date: date the movie is due on
+        :param returned_date: date the movie was returned on, datetime.min while pending
+        :return: the rental
+        """
+        r = Rental.__new__(Rental)
+        r.__id = _id
+        r._movie_id = sys.intern(movie_id)
+        r._client_id = sys.intern(client_id)
+        r._rented_date = rented_date
+        r._due_date = due_date
+        r._returned_date = returned_date
+        return r
+
     def __str__(self):
         s = f"ID: {self.id}\n" \
             f"Client ID: {self.client_id}\n" \
@@ -41,7 +81,7 @@ class Rental:
 
     @movie_id.setter
     def movie_id(self, value):
-        self._movie_id = value
+        self._movie_id = sys.intern(value)
 
     @property
     def client_id(self):
@@ -49,7 +89,7 @@ class Rental:
 
     @client_id.setter
     def client_id(self, value):
-        self._client_id = value
+        self._client_id = sys.intern(value)
 
     @property
     def due_date(self):
@@ -93,12 +133,56 @@ class Rental:
         if not isinstance(value, datetime.date):
             raise ValueError("Rented date not a date")
 
+    @staticmethod
+    def _parse_date(s):
+        """
+        Date from its DD/MM/YYYY form, memoized, without strptime for well formed dates
+        """
+        date = _DATES.get(s)
+        if date is None:
+            if len(s) == 10 and s[2] == "/" and s[5] == "/":
+                date = datetime.datetime(int(s[6:]), int(s[3:5]), int(s[:2]))
+            else:
+                date = datetime.datetime.strptime(s, '%d/%m/%Y')
+            if len(_DATES) >= _DATES_LIMIT:
+                _DATES.clear()
+            _DATES[s] = date
+        return date
+
     @staticmethod
     def get_from_string(st):
         s = st.strip().split(",")
-        return Rental(s[0], s[1], s[2], datetime.datetime.strptime(s[3], '%d/%m/%Y'), datetime.datetime.strptime(s[4], '%d/%m/%Y'), datetime.datetime.strptime(s[5], '%d/%m/%Y'))
+        return Rental.trusted(s[0], s[1], s[2], Rental._parse_date(s[3]), Rental._parse_date(s[4]),
+                              Rental._parse_date(s[5]))
+
+    @staticmethod
+    def get_many_from_strings(lines):
+        """
+        Rentals from their string forms, as a batch
+        :param lines: the string forms
+        :return: list of rentals
+        """
+        parse = Rental._parse_date
+        trusted = Rental.trusted
+        return [trusted(s[0], s[1], s[2], parse(s[3]), parse(s[4]), parse(s[5]))
+                for s in (line.strip().split(",") for line in lines)]
 
     @staticmethod
     def get_string_form(obj):
-        s = f"{obj.id},{obj.movie_id},{obj.client_id},{obj.rented_date.strftime('%d/%m/%Y')},{obj.due_date.strftime('%d/%m/%Y')},{obj.returned_date.strftime('%d/%m/%Y')}"
+        s = f"{obj.id},{obj.movie_id},{obj.client_id},{Rental._date_string(obj.rented_date)},{Rental._date_string(obj.due_date)},{Rental._date_string(obj.returned_date)}"
         return s
+
+    @staticmethod
+    def _date_string(value):
+        # strftime does not zero-pad years below 1000 on every platform, which breaks datetime.min
+        return f"{value.day:02d}/{value.month:02d}/{value.year:04d}"
+
+    @staticmethod
+    def get_from_row(row):
+        return Rental.trusted(row[0], row[1], row[2], datetime.datetime.fromordinal(row[3]),
+                      datetime.datetime.fromordinal(row[4]), datetime.datetime.fromordinal(row[5]))
+
+    @staticmethod
+    def get_row_form(obj):
+        return obj.id, obj.movie_id, obj.client_id, obj.rented_date.toordinal(), obj.due_date.toordinal(), \
+            obj.returned_date.toordinal()
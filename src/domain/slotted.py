@@ -0,0 +1,14 @@
+class Slotted:
+    """
+    Base of the domain classes, which keep their attributes in __slots__
+    """
+    __slots__ = ()
+
+    def __setstate__(self, state):
+        """
+        Unpickling, also of objects pickled before their class had slots
+        """
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
@@ -5,6 +5,7 @@ from client import Client
 from rental import Rental
 
 import datetime
+import pickle
 
 
 class TestCases(unittest.TestCase):
@@ -90,6 +91,26 @@ class TestCases(unittest.TestCase):
             ex = ve.exception
             self.assertEqual(ex, "Returned date not a date")
 
+    def test_rental_string_form(self):
+        r = Rental("1", "2", "3", datetime.datetime(2005, 3, 7), datetime.datetime(2009, 3, 7), datetime.datetime.min)
+        s = Rental.get_string_form(r)
+        self.assertEqual(s, "1,2,3,07/03/2005,07/03/2009,01/01/0001")
+        self.assertEqual(Rental.get_from_string(s).returned_date, datetime.datetime.min)
+
+    def test_slots(self):
+        m = Movie.trusted("1", "Title", "Desc", "Drama")
+        self.assertEqual(str(m), str(Movie(1, "Title", "Desc", "Drama")))
+        self.assertIs(m.genre, Movie(2, "T", "D", "".join(["Dra", "ma"])).genre)
+        self.assertFalse(hasattr(m, "__dict__"))
+
+        r = Rental.trusted("1", "2", "3", datetime.datetime(2005, 3, 7), datetime.datetime(2009, 3, 7),
+                           datetime.datetime.min)
+        self.assertEqual(str(pickle.loads(pickle.dumps(r))), str(r))
+        # pickled before the class had slots
+        c = Client.__new__(Client)
+        c.__setstate__({"_Client__id": "4", "_name": "name"})
+        self.assertEqual((c.id, c.name), ("4", "name"))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,64 +1,296 @@
-from src.repository.repository import Repository
+from src.repository.repository import Repository, RepositoryException
+from src.repository.collection import Collection
+
+import atexit
+import os
 import pickle
+import struct
 
 
 class BinaryRepository(Repository):
-    def __init__(self, file_name):
-        super().__init__()
+    """
+    Binary file repository with keyed random access
+
+    The data file starts with a magic header followed by records, each one made of a
+    (live flag, key length, payload length) header, the utf-8 key and the pickled element.
+    Updates append a new version of the record and deletes append a dead record, so a point
+    read or write touches a single record. The offset of the latest version of every key is
+    kept in an offset index, saved next to the data file on close and read back on startup;
+    records written after the saved offset index are scanned again. vacuum() rewrites the live
+    records only, reclaiming the space taken by old versions and deleted elements.
+    """
+    _MAGIC = b"BREP1\n"
+    _HEADER = struct.Struct("<BII")
+
+    def __init__(self, file_name, indexes=()):
+        super().__init__(indexes)
         self._fileName = file_name[1:len(file_name)-1]
+        self._offsetsFileName = self._fileName + ".idx"
+        self._offsets = {}
+        self._dead_bytes = 0
+        # key -> element (None when deleted) written by the running transaction, None outside of transactions
+        self._pending = None
+
+        self.__open()
+        self._reindex()
+        atexit.register(self.close)
 
     @property
     def data(self):
-        return super().data
+        c = Collection()
+        for key in self.__keys():
+            c.add(key, self.__read_record(key))
+        return c
 
     @property
     def values(self):
-        return super().values
-
-    def __read_elements(self):
-        with open(self._fileName, "rb") as f:
-            try:
-                d = pickle.load(f)
-            except EOFError:
-                d = {}
-                print("empty!!!!")
-            for elem in d:
-                super().add_element(d[elem])
-
-    def __update_file(self):
-        with open(self._fileName, "wb") as f:
-            pickle.dump(self.data, f)
-        self.data.clear()
+        return [self.__read_record(key) for key in self.__keys()]
+
+    @property
+    def dead_bytes(self):
+        """
+        Bytes taken by old versions and deleted elements, reclaimed by vacuum()
+        """
+        return self._dead_bytes
+
+    def __open(self):
+        legacy = None
+        if os.path.exists(self._fileName) and os.path.getsize(self._fileName) > 0:
+            with open(self._fileName, "rb") as f:
+                if f.read(len(self._MAGIC)) != self._MAGIC:
+                    # whole dict pickled by the old format
+                    f.seek(0)
+                    legacy = pickle.load(f)
+
+        if legacy is not None:
+            os.replace(self._fileName, self._fileName + ".bak")
+        self._file = open(self._fileName, "a+b")
+        if self._file.tell() == 0:
+            self._file.write(self._MAGIC)
+            self._file.flush()
+        if legacy is not None:
+            self.__write_records([(key, legacy[key]) for key in legacy])
+            return
+
+        start = len(self._MAGIC)
+        if os.path.exists(self._offsetsFileName):
+            with open(self._offsetsFileName, "rb") as f:
+                end, offsets, dead_bytes = pickle.load(f)
+            if end <= self._file.tell():
+                self._offsets, self._dead_bytes, start = offsets, dead_bytes, end
+        self.__scan(start)
+
+    def __scan(self, start):
+        """
+        Brings the offset index up to date with the records written from start onwards
+        """
+        f = self._file
+        end = f.seek(0, os.SEEK_END)
+        pos = start
+        while pos + self._HEADER.size <= end:
+            f.seek(pos)
+            live, key_len, payload_len = self._HEADER.unpack(f.read(self._HEADER.size))
+            size = self._HEADER.size + key_len + payload_len
+            if pos + size > end:
+                # torn record from an interrupted write
+                break
+            key = f.read(key_len).decode("utf-8")
+            if key in self._offsets:
+                self._dead_bytes += self._offsets[key][1]
+            if live:
+                self._offsets[key] = (pos, size)
+            else:
+                self._offsets.pop(key, None)
+                self._dead_bytes += size
+            pos += size
+        if pos != end:
+            f.truncate(pos)
+
+    def __write_records(self, items):
+        """
+        Appends a record for every (key, element) pair with a single write, None marks a deleted key
+        Inside a transaction the elements are held back until commit()
+        """
+        if self._pending is not None:
+            self._pending.update(items)
+            return
+
+        records = []
+        for key, obj in items:
+            k = key.encode("utf-8")
+            payload = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL) if obj is not None else b""
+            records.append(self._HEADER.pack(obj is not None, len(k), len(payload)) + k + payload)
+        pos = self._file.seek(0, os.SEEK_END)
+        self._file.write(b"".join(records))
+        self._file.flush()
+
+        for (key, obj), record in zip(items, records):
+            if key in self._offsets:
+                self._dead_bytes += self._offsets[key][1]
+            if obj is not None:
+                self._offsets[key] = (pos, len(record))
+            else:
+                self._offsets.pop(key, None)
+                self._dead_bytes += len(record)
+            pos += len(record)
+
+    def __write_record(self, key, obj):
+        self.__write_records([(key, obj)])
+
+    def __has(self, key):
+        if self._pending is not None and key in self._pending:
+            return self._pending[key] is not None
+        return key in self._offsets
+
+    def __keys(self):
+        if self._pending is None:
+            return list(self._offsets)
+        keys = [k for k in self._offsets if self._pending.get(k, k) is not None]
+        keys.extend(k for k in self._pending if k not in self._offsets and self._pending[k] is not None)
+        return keys
+
+    def __read_record(self, key):
+        if self._pending is not None and key in self._pending:
+            if self._pending[key] is None:
+                raise KeyError(key)
+            return self._pending[key]
+        pos, size = self._offsets[key]
+        self._file.seek(pos)
+        live, key_len, payload_len = self._HEADER.unpack(self._file.read(self._HEADER.size))
+        self._file.seek(key_len, os.SEEK_CUR)
+        return pickle.loads(self._file.read(payload_len))
+
+    def __save_offsets(self):
+        end = self._file.seek(0, os.SEEK_END)
+        with open(self._offsetsFileName + ".tmp", "wb") as f:
+            pickle.dump((end, self._offsets, self._dead_bytes), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(self._offsetsFileName + ".tmp", self._offsetsFileName)
+
+    def vacuum(self):
+        """
+        Rewrites the data file with the live records only
+        :return:
+        """
+        tmp = self._fileName + ".tmp"
+        offsets = {}
+        with open(tmp, "wb") as f:
+            f.write(self._MAGIC)
+            for key in self._offsets:
+                pos, size = self._offsets[key]
+                self._file.seek(pos)
+                offsets[key] = (f.tell(), size)
+                f.write(self._file.read(size))
+        self._file.close()
+        os.replace(tmp, self._fileName)
+        self._file = open(self._fileName, "a+b")
+        self._offsets = offsets
+        self._dead_bytes = 0
+        self.__save_offsets()
+
+    def begin(self):
+        """
+        Starts a transaction, its records are only written by commit()
+        :return:
+        """
+        super().begin()
+        self._pending = {}
+
+    def commit(self):
+        super().commit()
+        items, self._pending = list(self._pending.items()), None
+        if items:
+            self.__write_records(items)
+
+    def rollback(self):
+        super().rollback()
+        self._pending = None
+
+    def close(self):
+        """
+        Saves the offset index and closes the data file
+        :return:
+        """
+        if not self._file.closed:
+            self.__save_offsets()
+            self._file.close()
+        atexit.unregister(self.close)
 
     def add_element(self, obj):
-        self.__read_elements()
-        super().add_element(obj)
-        self.__update_file()
+        if self.__has(obj.id):
+            raise RepositoryException(f"Object with Id {str(obj.id)} already exists in repository")
+        self.__write_record(obj.id, obj)
+        self._index_add(obj)
+
+    def add_many(self, objs):
+        objs = list(objs)
+        ids = set()
+        for obj in objs:
+            if obj.id in ids or self.__has(obj.id):
+                raise RepositoryException(f"Object with Id {str(obj.id)} already exists in repository")
+            ids.add(obj.id)
+        self.__write_records([(obj.id, obj) for obj in objs])
+        for obj in objs:
+            self._index_add(obj)
+
+    def update_many(self, objs):
+        objs = list({obj.id: obj for obj in objs}.values())
+        old = [self.__read_record(obj.id) for obj in objs if self.__has(obj.id)]
+        self.__write_records([(obj.id, obj) for obj in objs])
+        for obj in old:
+            self._index_remove(obj)
+        for obj in objs:
+            self._index_add(obj)
+
+    def delete_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        for key in keys:
+            if not self.__has(key):
+                raise KeyError(key)
+        old = [self.__read_record(key) for key in keys]
+        self.__write_records([(key, None) for key in keys])
+        for obj in old:
+            self._index_remove(obj)
 
     def has_element(self, i_id):
-        self.__read_elements()
-        r = super().has_element(i_id)
-        self.__update_file()
-        return r
+        return self.__has(i_id)
+
+    def lookup(self, field, value):
+        indexes = self.indexes
+        if field in indexes:
+            return [self.__read_record(i) for i in indexes[field].get(value)]
+        return [x for x in self.values if getattr(x, field) == value]
+
+    def scan(self, predicate=None, fields=None):
+        """
+        Without a condition on the id or on an indexed field the records are read one at a time
+        """
+        if fields and ("id" in fields or any(f in self.indexes for f in fields)):
+            yield from super().scan(predicate, fields)
+            return
+        fields = fields or {}
+        for key in self.__keys():
+            obj = self.__read_record(key)
+            if all(getattr(obj, f) == v for f, v in fields.items()) and (predicate is None or predicate(obj)):
+                yield obj
 
     def __getitem__(self, item):
-        self.__read_elements()
-        i = super().__getitem__(item)
-        self.__update_file()
-        return i
+        return self.__read_record(item)
 
     def __setitem__(self, key, value):
-        self.__read_elements()
-        super().__setitem__(key, value)
-        self.__update_file()
+        if self.__has(key):
+            self._index_remove(self.__read_record(key))
+        self.__write_record(key, value)
+        self._index_add(value)
 
     def __delitem__(self, key):
-        self.__read_elements()
-        super().__delitem__(key)
-        self.__update_file()
+        if not self.__has(key):
+            raise KeyError(key)
+        obj = self.__read_record(key)
+        self.__write_record(key, None)
+        self._index_remove(obj)
 
     def __str__(self):
-        self.__read_elements()
-        r = super().__str__()
-        self.__update_file()
-        return r
+        s = ""
+        for i in self.__keys():
+            s += str(self.__read_record(i)) + "\n\n"
+        return s
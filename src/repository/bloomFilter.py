@@ -0,0 +1,114 @@
+import hashlib
+import math
+import os
+import pickle
+
+
+class BloomFilter:
+    """
+    Counting Bloom filter on the ids of the elements of a repository
+
+    Every id increments k counters picked by double hashing, removing it decrements them, so a
+    zero counter among the k of an id proves the id is not there. A counter that reaches 255
+    stays there, as the ids that went through it are no longer known. The filter is sized for
+    an error rate of 1% up to its capacity, it keeps working past it with more false positives.
+    Attach it to a repository to keep it in sync, save() and load() keep it next to a data file
+    together with the size and modification time of that file, so a stale filter is not used.
+    """
+    def __init__(self, capacity=1024, error_rate=0.01):
+        self._capacity = max(capacity, 1)
+        self._size = math.ceil(-self._capacity * math.log(error_rate) / math.log(2) ** 2)
+        self._hashes = max(1, round(self._size / self._capacity * math.log(2)))
+        self._counters = bytearray(self._size)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def __positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._size for i in range(self._hashes)]
+
+    def add(self, obj):
+        counters = self._counters
+        for i in self.__positions(obj.id):
+            if counters[i] < 255:
+                counters[i] += 1
+        self._count += 1
+
+    def remove(self, obj):
+        counters = self._counters
+        for i in self.__positions(obj.id):
+            if 0 < counters[i] < 255:
+                counters[i] -= 1
+        self._count -= 1
+
+    def clear(self):
+        self._counters = bytearray(self._size)
+        self._count = 0
+
+    def rebuild(self, objs, capacity):
+        """
+        Function to size the filter for a new capacity, filled with the given elements
+        :param objs: every element of the repository
+        :param capacity: the new capacity
+        :return:
+        """
+        self.__init__(capacity)
+        for obj in objs:
+            self.add(obj)
+
+    def might_contain(self, key):
+        """
+        False if the id is surely not in the repository, True if it may be
+        """
+        counters = self._counters
+        for i in self.__positions(key):
+            if not counters[i]:
+                return False
+        return True
+
+    @staticmethod
+    def stamp(file_name):
+        """
+        Size and modification time of a data file, what a saved filter is checked against
+        """
+        info = os.stat(file_name)
+        return info.st_size, info.st_mtime_ns
+
+    def save(self, file_name, stamp):
+        """
+        Function to write the filter to a file
+        :param file_name: the filter file
+        :param stamp: stamp of the data file the filter is for
+        :return:
+        """
+        with open(file_name + ".tmp", "wb") as f:
+            pickle.dump((stamp, self._capacity, self._size, self._hashes, self._count, bytes(self._counters)),
+                        f, pickle.HIGHEST_PROTOCOL)
+        os.replace(file_name + ".tmp", file_name)
+
+    @staticmethod
+    def load(file_name, stamp):
+        """
+        Function to read a filter saved by save()
+        :param file_name: the filter file
+        :param stamp: stamp of the data file now
+        :return: the filter, None if there is none, it is for another version of the data file or it is over capacity
+        """
+        if not os.path.exists(file_name):
+            return None
+        with open(file_name, "rb") as f:
+            saved, capacity, size, hashes, count, counters = pickle.load(f)
+        if saved != stamp or count > capacity:
+            return None
+        f = BloomFilter.__new__(BloomFilter)
+        f._capacity, f._size, f._hashes, f._count = capacity, size, hashes, count
+        f._counters = bytearray(counters)
+        return f
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+import sys
+
+
+def size_of(obj):
+    """
+    Approximate bytes taken by an element: the object and the values of its attributes
+    """
+    values = list(vars(obj).values()) if hasattr(obj, "__dict__") else []
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name.startswith("__") and not name.endswith("__"):
+                name = f"_{cls.__name__.lstrip('_')}{name}"
+            values.append(getattr(obj, name, None))
+    return sys.getsizeof(obj) + sum(sys.getsizeof(v) for v in values if v is not None)
+
+
+class CachedRepository:
+    """
+    Read-through LRU cache in front of another repository
+
+    Elements read by id are kept in an identity map, so reading the same id again returns the
+    same object without going to the storage of the repository. The least recently used
+    elements are evicted once there are more than max_entries of them or they take more than
+    max_bytes, a limit of 0 meaning no limit. Changes go to the repository and update the cache,
+    a rollback empties it. Lookups and scans are not cached, but return the cached object for
+    the elements that are in the cache.
+    """
+    def __init__(self, repository, max_entries=0, max_bytes=0):
+        self._repository = repository
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        # id -> (element, size), least recently used first
+        self._cache = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def repository(self):
+        return self._repository
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def evictions(self):
+        return self._evictions
+
+    @property
+    def cached(self):
+        """
+        Number of elements in the cache
+        """
+        return len(self._cache)
+
+    @property
+    def cached_bytes(self):
+        return self._bytes
+
+    def __put(self, key, obj):
+        self.__drop(key)
+        size = size_of(obj) if self._max_bytes else 0
+        self._cache[key] = (obj, size)
+        self._bytes += size
+        while self._cache and ((self._max_entries and len(self._cache) > self._max_entries) or
+                               (self._max_bytes and self._bytes > self._max_bytes)):
+            key, (obj, size) = self._cache.popitem(last=False)
+            self._bytes -= size
+            self._evictions += 1
+
+    def __drop(self, key):
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def __known(self, obj):
+        entry = self._cache.get(obj.id)
+        return entry[0] if entry is not None else obj
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._bytes = 0
+
+    """
+    The repository interface
+    """
+    @property
+    def data(self):
+        return self._repository.data
+
+    @property
+    def values(self):
+        return [self.__known(obj) for obj in self._repository.values]
+
+    @property
+    def indexes(self):
+        return self._repository.indexes
+
+    @property
+    def in_transaction(self):
+        return self._repository.in_transaction
+
+    def attach(self, index, seed=True):
+        self._repository.attach(index, seed)
+
+    def begin(self):
+        self._repository.begin()
+
+    def commit(self):
+        self._repository.commit()
+
+    def rollback(self):
+        self._repository.rollback()
+        self.clear_cache()
+
+    def add_element(self, obj):
+        self._repository.add_element(obj)
+        self.__put(obj.id, obj)
+
+    def add_many(self, objs):
+        objs = list(objs)
+        self._repository.add_many(objs)
+        for obj in objs:
+            self.__put(obj.id, obj)
+
+    def update_many(self, objs):
+        objs = list(objs)
+        self._repository.update_many(objs)
+        for obj in objs:
+            self.__put(obj.id, obj)
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        self._repository.delete_many(keys)
+        for key in keys:
+            self.__drop(key)
+
+    def has_element(self, i_id):
+        return i_id in self._cache or self._repository.has_element(i_id)
+
+    def lookup(self, field, value):
+        return [self.__known(obj) for obj in self._repository.lookup(field, value)]
+
+    def scan(self, predicate=None, fields=None):
+        for obj in self._repository.scan(predicate, fields):
+            yield self.__known(obj)
+
+    def partitions(self, n):
+        return self._repository.partitions(n)
+
+    def close(self):
+        if hasattr(self._repository, "close"):
+            self._repository.close()
+
+    def __getitem__(self, item):
+        entry = self._cache.get(item)
+        if entry is not None:
+            self._hits += 1
+            self._cache.move_to_end(item)
+            return entry[0]
+        self._misses += 1
+        obj = self._repository[item]
+        self.__put(item, obj)
+        return obj
+
+    def __setitem__(self, key, value):
+        self._repository[key] = value
+        self.__put(key, value)
+
+    def __delitem__(self, key):
+        del self._repository[key]
+        self.__drop(key)
+
+    def __str__(self):
+        return str(self._repository)
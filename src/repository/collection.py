@@ -3,35 +3,94 @@ import unittest
 
 class Collection:
     class ColIterator:
-        def __init__(self, col):
+        """
+        Iterator over the elements of a collection, O(1) per step
+
+        A regular iterator fails with RuntimeError as soon as an element is added or removed
+        during iteration. A snapshot iterator keeps walking the elements the collection held
+        when it was created, whatever happens to the collection afterwards. It stops counting
+        as a reader of the collection's elements once it is exhausted or dropped.
+        """
+        def __init__(self, col, snapshot=False):
             self._collection = col
-            self._pos = 0
+            self._snapshot = snapshot
+            self._version = col._version
+            # the elements a snapshot reads, None once it no longer reads them
+            self._source = None
+            if snapshot:
+                self._source = col._data
+                col._readers += 1
+            self._elements = iter(col._data.values())
+
+        def __release(self):
+            if self._source is not None:
+                # the collection may have moved on to its own copy already
+                if self._collection._data is self._source:
+                    self._collection._readers -= 1
+                self._source = None
+
+        def __del__(self):
+            self.__release()
+
+        def __iter__(self):
+            return self
 
         def __next__(self):
-            if self._pos == len(list(self._collection._data.keys())):
-                raise StopIteration()
-            self._pos += 1
-            return self._collection._data[list(self._collection._data.keys())[self._pos-1]]
+            if not self._snapshot and self._collection._version != self._version:
+                raise RuntimeError("Collection changed during iteration")
+            try:
+                return next(self._elements)
+            except StopIteration:
+                self.__release()
+                raise
 
     def __init__(self):
         self._data = dict()
+        # bumped on every added or removed key, checked by the iterators
+        self._version = 0
+        # number of live snapshot iterators reading _data
+        self._readers = 0
+
+    def __detach(self):
+        """
+        Gives the collection its own copy of the elements if a snapshot iterator still reads them
+        """
+        if self._readers:
+            self._data = dict(self._data)
+            self._readers = 0
 
     def add(self, key, elem):
-        self._data[key] = elem
+        self[key] = elem
 
     def clear(self):
-        self.clear()
+        self._data = dict()
+        self._readers = 0
+        self._version += 1
 
     @property
     def values(self):
         return list(self._data.values())
 
+    @property
+    def version(self):
+        return self._version
+
     def has_element(self, obj):
         return True if obj.id in self._data else False
 
     def has_id(self, id):
         return True if id in self._data.keys() else False
 
+    def snapshot(self):
+        """
+        Iterator over the elements currently in the collection, unaffected by later changes
+        :return: a snapshot iterator
+        """
+        return self.ColIterator(self, snapshot=True)
+
+    def __len__(self):
+        return len(self._data)
+
     def __iter__(self):
         return self.ColIterator(self)
 
@@ -39,7 +98,14 @@ class Collection:
         return self._data[key]
 
     def __setitem__(self, key, value):
+        self.__detach()
+        if key not in self._data:
+            self._version += 1
         self._data[key] = value
 
     def __delitem__(self, key):
+        if key not in self._data:
+            raise KeyError(key)
+        self.__detach()
+        self._version += 1
         del self._data[key]
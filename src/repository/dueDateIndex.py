@@ -0,0 +1,94 @@
+from src.repository.sortedList import SortedList
+
+from bisect import bisect_left, insort
+
+import datetime
+
+
+class DueDateIndex:
+    """
+    Rentals not returned yet, sorted by due date, overall and per client
+
+    The (due date, id) pairs are kept sorted, overall in a SortedList and per client in a
+    plain list, so the rentals due before a date are a prefix found by bisection, and the
+    earliest due rental of a client is the head of its list, which tells whether the client
+    has overdue rentals in constant time. Attach it to the rental repository: returning a
+    rental removes it and unreturning it puts it back, as for any other update.
+    """
+    def __init__(self):
+        self._all = SortedList()
+        # client id -> sorted list of (due date, id)
+        self._clients = {}
+
+    @staticmethod
+    def __pending(rental):
+        return rental.returned_date == datetime.datetime.min
+
+    def add(self, rental):
+        if DueDateIndex.__pending(rental):
+            entry = (rental.due_date, rental.id)
+            self._all.add(entry)
+            insort(self._clients.setdefault(rental.client_id, []), entry)
+
+    @staticmethod
+    def __delete(entries, entry):
+        i = bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+
+    def remove(self, rental):
+        if DueDateIndex.__pending(rental):
+            entry = (rental.due_date, rental.id)
+            self._all.remove(entry)
+            entries = self._clients.get(rental.client_id)
+            if entries is not None:
+                DueDateIndex.__delete(entries, entry)
+                if not entries:
+                    del self._clients[rental.client_id]
+
+    def clear(self):
+        self._all.clear()
+        self._clients = {}
+
+    @staticmethod
+    def __before(entries, date):
+        return entries[:bisect_left(entries, (date,))]
+
+    def overdue(self, date):
+        """
+        Rentals not returned and due before a date
+        :param date: the date
+        :return: list of (due date, rental id), earliest due first
+        """
+        return self._all.before((date,))
+
+    def client_earliest_due(self, c_id):
+        """
+        Earliest due date among the rentals of a client not returned yet
+        :param c_id: client id
+        :return: the due date, None if the client has no such rentals
+        """
+        entries = self._clients.get(c_id)
+        return entries[0][0] if entries else None
+
+    def client_has_overdue(self, c_id, date):
+        """
+        Whether a client has rentals not returned and due before a date
+        """
+        entries = self._clients.get(c_id)
+        return bool(entries) and entries[0][0] < date
+
+    def client_overdue_count(self, c_id, date):
+        """
+        Number of rentals of a client not returned and due before a date
+        """
+        return bisect_left(self._clients.get(c_id, []), (date,))
+
+    def client_overdue(self, c_id, date):
+        """
+        Rentals of a client not returned and due before a date
+        :param c_id: client id
+        :param date: the date
+        :return: list of (due date, rental id), earliest due first
+        """
+        return DueDateIndex.__before(self._clients.get(c_id, []), date)
@@ -1,66 +1,293 @@
+from src.repository.bloomFilter import BloomFilter
 from src.repository.repository import Repository
+from src.repository.textLoader import file_ranges, read_elements, read_range, scan_elements
+
+import atexit
+import threading
+import time
 
 
 class FileRepository(Repository):
-    def __init__(self, file_name, entity_type):
+    """
+    Text file repository
+
+    In "direct" mode the file is parsed on every call and rewritten after every change.
+    In "writeback" mode the file is loaded once and kept in memory, changed keys are tracked
+    as dirty and the file is rewritten by flush(), which also runs automatically every
+    flush_ops changes, flush_interval seconds after a change when no flush ran in between
+    (by a daemon timer thread) and at interpreter exit.
+    In both modes, changes made inside a transaction are written once, by commit().
+    In direct mode a counting Bloom filter on the ids, saved next to the file, answers the
+    has_element calls for missing ids without reading the file.
+    """
+    def __init__(self, file_name, entity_type, mode="direct", flush_ops=0, flush_interval=0, indexes=()):
         self._entity_type = entity_type
-        super().__init__()
+        super().__init__(indexes)
         self._fileName = file_name[1:len(file_name)-1]
 
+        if mode not in ("direct", "writeback"):
+            raise ValueError(f"Unknown file repository mode {mode}")
+        self._mode = mode
+        self._flush_ops = flush_ops
+        self._flush_interval = flush_interval
+        self._dirty = set()
+        self._pending_ops = 0
+        self._last_flush = time.monotonic()
+        # pending timed flush, the lock keeps it from writing while the elements change
+        self._timer = None
+        self._lock = threading.RLock()
+        # keys changed by the running transaction, None outside of transactions
+        self._tx_keys = None
+
+        if self._mode == "writeback":
+            self.__load()
+            atexit.register(self.flush)
+        self._reindex()
+        self._filter = None
+        if self._mode == "direct":
+            self.__attach_filter()
+        self.__release()
+
     @property
     def data(self):
+        self.__read_elements()
         return super().data
 
     @property
     def values(self):
+        self.__read_elements()
         return super().values
 
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def dirty(self):
+        """
+        Keys changed since the last flush (always empty in direct mode)
+        """
+        return set(self._dirty)
+
+    def __load(self):
+        data = super().data
+        data.clear()
+        for obj in read_elements(self._fileName, self._entity_type):
+            data.add(obj.id, obj)
+
+    def __stamp(self):
+        try:
+            return BloomFilter.stamp(self._fileName)
+        except FileNotFoundError:
+            return None
+
+    def __attach_filter(self):
+        """
+        Attaches the saved filter if it is for the current file, or one built from the file
+        """
+        self._filter = BloomFilter.load(self._fileName + ".bloom", self.__stamp())
+        if self._filter is not None:
+            self.attach(self._filter, seed=False)
+            return
+        values = self.values
+        self._filter = BloomFilter(max(1024, 2 * len(values)))
+        for obj in values:
+            self._filter.add(obj)
+        self.attach(self._filter, seed=False)
+        self._filter.save(self._fileName + ".bloom", self.__stamp())
+
     def __read_elements(self):
-        with open(self._fileName, "a+") as f:
-            f.seek(0)
-            lines = f.readlines()
-            for line in lines:
-                if line != "\n":
-                    super().add_element(self._entity_type.get_from_string(line))
-
-    def __update_file(self):
+        if self._mode == "direct" and self._tx_keys is None:
+            self.__load()
+
+    def __write_file(self):
         with open(self._fileName, "wt") as f:
             s = ""
             for element in super().data:
-                s += str(self._entity_type.get_string_form(super().data[element]))
+                s += str(self._entity_type.get_string_form(element))
                 s += "\n"
             f.write(s)
-        self.data.clear()
+        if self._filter is not None:
+            if len(self._filter) > self._filter.capacity:
+                self._filter.rebuild(super().data, 2 * len(self._filter))
+            self._filter.save(self._fileName + ".bloom", self.__stamp())
+
+    def __update_file(self, *keys):
+        """
+        Persists a change to the given keys, either right away or by marking them dirty
+        """
+        if self._tx_keys is not None:
+            self._tx_keys.update(keys)
+            return
+
+        if self._mode == "direct":
+            self.__write_file()
+            super().data.clear()
+            return
+
+        self._dirty.update(keys)
+        self._pending_ops += len(keys)
+        if self._flush_ops and self._pending_ops >= self._flush_ops:
+            self.flush()
+        elif self._flush_interval and time.monotonic() - self._last_flush >= self._flush_interval:
+            self.flush()
+        elif self._flush_interval and self._timer is None:
+            self._timer = threading.Timer(self._last_flush + self._flush_interval - time.monotonic(),
+                                          self.__timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def __timed_flush(self):
+        with self._lock:
+            # a flush that ran in the meantime cancelled or replaced this timer
+            if self._timer is threading.current_thread():
+                self.flush()
+
+    def __release(self):
+        """
+        Drops the loaded elements after a read-only call
+        """
+        if self._mode == "direct" and self._tx_keys is None:
+            super().data.clear()
+
+    def flush(self):
+        """
+        Writes the in-memory elements to the file if anything changed since the last flush
+        Changes of a transaction are only written once it is committed
+        :return:
+        """
+        with self._lock:
+            if self._tx_keys is not None:
+                return
+            timer, self._timer = self._timer, None
+            if timer is not None:
+                timer.cancel()
+            if self._mode == "writeback" and self._dirty:
+                self.__write_file()
+                self._dirty.clear()
+            self._pending_ops = 0
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Flushes pending changes, which cancels a pending timed flush, and stops flushing at exit
+        :return:
+        """
+        self.flush()
+        if self._mode == "writeback":
+            atexit.unregister(self.flush)
+
+    def begin(self):
+        """
+        Starts a transaction, the file is loaded once and only written again by commit()
+        :return:
+        """
+        with self._lock:
+            # a file that cannot be read leaves no transaction behind
+            if self._mode == "direct" and not self.in_transaction:
+                self.__load()
+            super().begin()
+            self._tx_keys = set()
+
+    def commit(self):
+        with self._lock:
+            super().commit()
+            keys, self._tx_keys = self._tx_keys, None
+            try:
+                if self._mode == "direct":
+                    if keys:
+                        self.__write_file()
+                elif keys:
+                    self._dirty.update(keys)
+                    self._pending_ops += len(keys)
+                    self.flush()
+            finally:
+                self.__release()
+
+    def rollback(self):
+        with self._lock:
+            super().rollback()
+            self._tx_keys = None
+            self.__release()
 
     def add_element(self, obj):
-        self.__read_elements()
-        super().add_element(obj)
-        self.__update_file()
+        with self._lock:
+            self.__read_elements()
+            super().add_element(obj)
+            self.__update_file(obj.id)
+
+    def add_many(self, objs):
+        with self._lock:
+            objs = list(objs)
+            self.__read_elements()
+            super().add_many(objs)
+            self.__update_file(*[obj.id for obj in objs])
+
+    def update_many(self, objs):
+        with self._lock:
+            objs = list(objs)
+            self.__read_elements()
+            super().update_many(objs)
+            self.__update_file(*[obj.id for obj in objs])
+
+    def delete_many(self, keys):
+        with self._lock:
+            keys = list(keys)
+            self.__read_elements()
+            super().delete_many(keys)
+            self.__update_file(*keys)
 
     def has_element(self, i_id):
+        if self._filter is not None and not self._filter.might_contain(i_id):
+            return False
         self.__read_elements()
         r = super().has_element(i_id)
-        self.__update_file()
+        self.__release()
+        return r
+
+    def scan(self, predicate=None, fields=None):
+        """
+        In direct mode the file is streamed and only the matching lines become elements
+        """
+        if self._mode == "direct" and self._tx_keys is None:
+            return scan_elements(self._fileName, self._entity_type, predicate, fields)
+        return super().scan(predicate, fields)
+
+    def partitions(self, n):
+        """
+        In direct mode the slices are byte ranges of the file, read by the other processes
+        """
+        if self._mode == "direct" and self._tx_keys is None:
+            return [(read_range, (self._fileName, self._entity_type, start, end))
+                    for start, end in file_ranges(self._fileName, n)]
+        return super().partitions(n)
+
+    def lookup(self, field, value):
+        self.__read_elements()
+        r = super().lookup(field, value)
+        self.__release()
         return r
 
     def __getitem__(self, item):
         self.__read_elements()
         i = super().__getitem__(item)
-        self.__update_file()
+        self.__release()
         return i
 
     def __setitem__(self, key, value):
-        self.__read_elements()
-        super().__setitem__(key, value)
-        self.__update_file()
+        with self._lock:
+            self.__read_elements()
+            super().__setitem__(key, value)
+            self.__update_file(key)
 
     def __delitem__(self, key):
-        self.__read_elements()
-        super().__delitem__(key)
-        self.__update_file()
+        with self._lock:
+            self.__read_elements()
+            super().__delitem__(key)
+            self.__update_file(key)
 
     def __str__(self):
         self.__read_elements()
         r = super().__str__()
-        self.__update_file()
+        self.__release()
         return r
@@ -0,0 +1,101 @@
+import os
+import pickle
+
+
+class IdAllocator:
+    """
+    Hands out fresh numeric ids for the elements of a repository
+
+    The allocator keeps the highest numeric id it has seen or handed out, and a free-list of
+    ids handed out and given back unused by release(). next_id() and reserve(n) take from the
+    free-list first and then count up from the high-water mark, so they never ask the
+    repository which ids are in use. Attach it to the repository to learn about ids added by
+    other means. With a file name, the mark and the free-list are saved after every change, so
+    ids handed out but not added yet, or added and later removed, are not handed out again
+    after a restart.
+    """
+    def __init__(self, file_name=None):
+        self._fileName = file_name
+        self._high = 0
+        # ids given back, and the ones of them still free, an id added since is dropped lazily
+        self._free = []
+        self._free_set = set()
+        if file_name is not None and os.path.exists(file_name):
+            with open(file_name, "rb") as f:
+                self._high, self._free = pickle.load(f)
+            self._free_set = set(self._free)
+
+    @property
+    def high(self):
+        """
+        Highest id seen or handed out
+        """
+        return self._high
+
+    @staticmethod
+    def __number(key):
+        return int(key) if key.isdecimal() and key.isascii() else None
+
+    def add(self, obj):
+        n = IdAllocator.__number(obj.id)
+        if n is None:
+            return
+        if n > self._high:
+            self._high = n
+        self._free_set.discard(n)
+
+    def remove(self, obj):
+        pass
+
+    def clear(self):
+        pass
+
+    def __save(self):
+        if self._fileName is None:
+            return
+        free = [n for n in self._free if n in self._free_set]
+        with open(self._fileName + ".tmp", "wb") as f:
+            pickle.dump((self._high, free), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(self._fileName + ".tmp", self._fileName)
+
+    def __take(self, n):
+        ids = []
+        while self._free and len(ids) < n:
+            i = self._free.pop()
+            if i in self._free_set:
+                self._free_set.remove(i)
+                ids.append(i)
+        ids.extend(range(self._high + 1, self._high + 1 + n - len(ids)))
+        self._high = max(self._high, ids[-1]) if ids else self._high
+        self.__save()
+        return [str(i) for i in ids]
+
+    def next_id(self):
+        """
+        Function to get an id no element has
+        :return: the id, a string
+        """
+        return self.__take(1)[0]
+
+    def reserve(self, n):
+        """
+        Function to get several ids no element has, for a batch
+        :param n: number of ids
+        :return: list of ids, strings
+        """
+        if n < 0:
+            raise ValueError("Cannot reserve a negative number of ids")
+        return self.__take(n)
+
+    def release(self, ids):
+        """
+        Function to give back ids handed out by next_id() or reserve() that were not used
+        :param ids: the ids
+        :return:
+        """
+        for key in ids:
+            n = IdAllocator.__number(key)
+            if n is not None and n <= self._high and n not in self._free_set:
+                self._free.append(n)
+                self._free_set.add(n)
+        self.__save()
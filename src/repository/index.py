@@ -0,0 +1,38 @@
+class SecondaryIndex:
+    """
+    Index from the values of one field to the ids of the elements having them
+
+    Like every structure attached to a repository it is told about each element that
+    enters the repository through add(obj) and about each one that leaves it through
+    remove(obj); an update is a remove of the old element followed by an add of the new one.
+    """
+    def __init__(self, field):
+        self._field = field
+        # value -> dict of ids (a dict keeps the ids in insertion order)
+        self._ids = {}
+
+    @property
+    def field(self):
+        return self._field
+
+    def add(self, obj):
+        self._ids.setdefault(getattr(obj, self._field), {})[obj.id] = None
+
+    def remove(self, obj):
+        value = getattr(obj, self._field)
+        ids = self._ids.get(value)
+        if ids is not None:
+            ids.pop(obj.id, None)
+            if not ids:
+                del self._ids[value]
+
+    def clear(self):
+        self._ids.clear()
+
+    def get(self, value):
+        """
+        Ids of the elements with the given value
+        :param value: value of the indexed field
+        :return: list of ids
+        """
+        return list(self._ids.get(value, ()))
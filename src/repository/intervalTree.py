@@ -0,0 +1,162 @@
+import random
+
+
+class _Node:
+    __slots__ = ("start", "end", "value", "priority", "max_end", "left", "right")
+
+    def __init__(self, start, end, value):
+        self.start = start
+        self.end = end
+        self.value = value
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    @property
+    def key(self):
+        return self.start, self.value
+
+    def update(self):
+        self.max_end = self.end
+        if self.left is not None and self.left.max_end > self.max_end:
+            self.max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > self.max_end:
+            self.max_end = self.right.max_end
+
+
+def _rotate_right(node):
+    top = node.left
+    node.left = top.right
+    top.right = node
+    node.update()
+    top.update()
+    return top
+
+
+def _rotate_left(node):
+    top = node.right
+    node.right = top.left
+    top.left = node
+    node.update()
+    top.update()
+    return top
+
+
+def _insert(node, new):
+    if node is None:
+        return new
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+        if node.left.priority > node.priority:
+            return _rotate_right(node)
+    else:
+        node.right = _insert(node.right, new)
+        if node.right.priority > node.priority:
+            return _rotate_left(node)
+    node.update()
+    return node
+
+
+def _delete(node, key):
+    if node is None:
+        return None
+    if key < node.key:
+        node.left = _delete(node.left, key)
+    elif key > node.key:
+        node.right = _delete(node.right, key)
+    elif node.left is None:
+        return node.right
+    elif node.right is None:
+        return node.left
+    elif node.left.priority > node.right.priority:
+        node = _rotate_right(node)
+        node.right = _delete(node.right, key)
+    else:
+        node = _rotate_left(node)
+        node.left = _delete(node.left, key)
+    node.update()
+    return node
+
+
+def _overlap(node, start, end, out, first):
+    """
+    Appends the values of the intervals meeting [start, end) in start order, only the first one if first is set
+    """
+    while node is not None and node.max_end > start:
+        _overlap(node.left, start, end, out, first)
+        if first and out:
+            return
+        if node.start >= end:
+            return
+        if node.end > start:
+            out.append(node.value)
+            if first:
+                return
+        node = node.right
+
+
+class IntervalTree:
+    """
+    Half-open intervals [start, end) with a value each, queried by the intervals they meet
+
+    The intervals are kept in a treap ordered by (start, value), every node also holding the
+    largest end in its subtree, so the subtrees that end before a query are skipped. Inserts,
+    removes and the first hit of a query take logarithmic expected time, listing every hit
+    takes an extra step per hit. The values must be comparable and unique for a start.
+    """
+    def __init__(self):
+        self._root = None
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def insert(self, start, end, value):
+        self._root = _insert(self._root, _Node(start, end, value))
+        self._len += 1
+
+    def remove(self, start, value):
+        """
+        Function to remove the interval with a start and a value, if there is one
+        :param start: start of the interval
+        :param value: its value
+        :return:
+        """
+        if self.find(start, value):
+            self._root = _delete(self._root, (start, value))
+            self._len -= 1
+
+    def find(self, start, value):
+        node = self._root
+        while node is not None and node.key != (start, value):
+            node = node.left if (start, value) < node.key else node.right
+        return node is not None
+
+    def clear(self):
+        self._root = None
+        self._len = 0
+
+    def overlap(self, start, end):
+        """
+        Values of the intervals meeting [start, end)
+        :return: list of values, by start
+        """
+        out = []
+        _overlap(self._root, start, end, out, False)
+        return out
+
+    def stab(self, point):
+        """
+        Values of the intervals holding a point
+        :return: list of values, by start
+        """
+        return self.overlap(point, point + 1)
+
+    def meets(self, start, end):
+        """
+        Whether any interval meets [start, end), stops at the first one found
+        """
+        out = []
+        _overlap(self._root, start, end, out, True)
+        return bool(out)
@@ -0,0 +1,201 @@
+from src.repository.repository import Repository
+from src.repository.textLoader import read_elements
+
+import atexit
+import os
+import threading
+
+
+class JournalRepository(Repository):
+    """
+    Journaled text file repository
+
+    Elements are kept in memory. The base file holds the text form of every element, and every
+    change is appended to a journal file next to it as one small record:
+        A,<element string form>   - element added
+        U,<element string form>   - element updated
+        D,<id>                    - element deleted
+    Once the journal grows past compact_size bytes or holds more than compact_ratio records per
+    element, it is folded into a new base file by a background thread. On startup the base file
+    is replayed, then any journal being compacted when the program stopped, then the journal.
+    """
+    def __init__(self, file_name, entity_type, compact_size=1048576, compact_ratio=1.0, indexes=()):
+        self._entity_type = entity_type
+        super().__init__(indexes)
+        self._fileName = file_name[1:len(file_name)-1]
+        self._journalName = self._fileName + ".journal"
+        self._compactingName = self._fileName + ".journal.old"
+
+        self._compact_size = compact_size
+        self._compact_ratio = compact_ratio
+        self._journal_bytes = 0
+        self._journal_records = 0
+
+        self._lock = threading.Lock()
+        self._compactor = None
+        # records of the running transaction, None outside of transactions
+        self._tx_records = None
+
+        self.__replay()
+        self._journal = open(self._journalName, "at")
+        if os.path.exists(self._compactingName):
+            # the last compaction did not finish
+            self.compact(wait=True)
+        atexit.register(self.close)
+
+    @property
+    def journal_size(self):
+        return self._journal_bytes
+
+    def __replay(self):
+        for obj in read_elements(self._fileName, self._entity_type):
+            super().add_element(obj)
+
+        for name in (self._compactingName, self._journalName):
+            if not os.path.exists(name):
+                continue
+            with open(name, "r+b") as f:
+                data = f.read()
+                # a crash in the middle of an append leaves an incomplete last record behind,
+                # cut it off so the next append does not run on from it
+                end = data.rfind(b"\n") + 1
+                if end != len(data):
+                    f.truncate(end)
+            lines = data[:end].decode("utf-8").split("\n")[:-1]
+            for line in lines:
+                self.__apply(line)
+            if name == self._journalName:
+                self._journal_records = len(lines)
+                self._journal_bytes = os.path.getsize(name)
+
+    def __apply(self, record):
+        op, payload = record[0], record[2:]
+        if op == "D":
+            key = payload.strip()
+            if super().has_element(key):
+                super().__delitem__(key)
+        else:
+            obj = self._entity_type.get_from_string(payload)
+            super().__setitem__(obj.id, obj)
+
+    def __append(self, *records):
+        """
+        Appends (op, payload) records to the journal with a single write
+        Inside a transaction the records are held back until commit()
+        """
+        if self._tx_records is not None:
+            self._tx_records.extend(records)
+            return
+
+        text = "".join(f"{op},{payload}\n" for op, payload in records)
+        with self._lock:
+            self._journal.write(text)
+            self._journal.flush()
+            self._journal_bytes += len(text)
+            self._journal_records += len(records)
+
+        if self._journal_bytes >= self._compact_size or \
+                self._journal_records > self._compact_ratio * max(len(super().data), 1):
+            self.compact()
+
+    def compact(self, wait=False):
+        """
+        Folds the journal into a new base file
+        The journal is swapped for an empty one right away, the new base file is written by a
+        background thread unless wait is True
+        :param wait: True to write the base file before returning
+        :return:
+        """
+        compactor = self._compactor
+        if compactor is not None:
+            if not wait:
+                return
+            compactor.join()
+
+        with self._lock:
+            self._journal.close()
+            if not os.path.exists(self._compactingName):
+                os.replace(self._journalName, self._compactingName)
+            else:
+                # an earlier compaction failed, keep its records in front of the new ones
+                with open(self._journalName, "rt") as src, open(self._compactingName, "at") as dst:
+                    dst.write(src.read())
+                os.remove(self._journalName)
+            self._journal = open(self._journalName, "at")
+            self._journal_bytes = 0
+            self._journal_records = 0
+            lines = [self._entity_type.get_string_form(x) + "\n" for x in super().data]
+
+            # the thread clears _compactor when done, so it is kept in a local to join it
+            compactor = threading.Thread(target=self.__write_base, args=(lines,))
+            self._compactor = compactor
+        compactor.start()
+        if wait:
+            compactor.join()
+
+    def __write_base(self, lines):
+        try:
+            tmp = self._fileName + ".tmp"
+            with open(tmp, "wt") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._fileName)
+            os.remove(self._compactingName)
+        finally:
+            with self._lock:
+                if self._compactor is threading.current_thread():
+                    self._compactor = None
+
+    def close(self):
+        """
+        Waits for a running compaction and closes the journal
+        :return:
+        """
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        if not self._journal.closed:
+            self._journal.close()
+        atexit.unregister(self.close)
+
+    def begin(self):
+        super().begin()
+        self._tx_records = []
+
+    def commit(self):
+        super().commit()
+        records, self._tx_records = self._tx_records, None
+        if records:
+            self.__append(*records)
+
+    def rollback(self):
+        super().rollback()
+        self._tx_records = None
+
+    def add_element(self, obj):
+        super().add_element(obj)
+        self.__append(("A", self._entity_type.get_string_form(obj)))
+
+    def add_many(self, objs):
+        objs = list(objs)
+        super().add_many(objs)
+        self.__append(*[("A", self._entity_type.get_string_form(obj)) for obj in objs])
+
+    def update_many(self, objs):
+        objs = list(objs)
+        super().update_many(objs)
+        self.__append(*[("U", self._entity_type.get_string_form(obj)) for obj in objs])
+
+    def delete_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        super().delete_many(keys)
+        self.__append(*[("D", key) for key in keys])
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.__append(("U", self._entity_type.get_string_form(value)))
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.__append(("D", key))
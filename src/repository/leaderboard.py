@@ -0,0 +1,62 @@
+from src.repository.sortedList import SortedList
+
+
+class Leaderboard:
+    """
+    Ids ranked by a score, highest first, ties by id
+
+    The (-score, id) entries are kept in a SortedList. Setting a score moves a single entry,
+    and top(k, offset) skips whole blocks up to offset and reads the page from there, so
+    reading a page does not sort anything.
+    """
+    def __init__(self):
+        self._entries = SortedList()
+        # id -> score
+        self._scores = {}
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, key):
+        return key in self._scores
+
+    def score(self, key):
+        return self._scores[key]
+
+    def set(self, key, score):
+        """
+        Function to give an id a new score, adding it if it is not ranked yet
+        :param key: id
+        :param score: its score
+        :return:
+        """
+        old = self._scores.get(key)
+        if old == score:
+            return
+        if old is not None:
+            self._entries.remove((-old, key))
+        self._scores[key] = score
+        self._entries.add((-score, key))
+
+    def discard(self, key):
+        """
+        Function to remove an id from the ranking, if it is ranked
+        :param key: id
+        :return:
+        """
+        old = self._scores.pop(key, None)
+        if old is not None:
+            self._entries.remove((-old, key))
+
+    def clear(self):
+        self._entries.clear()
+        self._scores = {}
+
+    def top(self, k, offset=0):
+        """
+        Function to read a page of the ranking
+        :param k: number of ids
+        :param offset: rank of the first one, 0 for the highest score
+        :return: list of (id, score)
+        """
+        return [(key, -score) for score, key in self._entries.page(k, offset)]
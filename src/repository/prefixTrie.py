@@ -0,0 +1,83 @@
+class _Node:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        # ids of the elements with a key ending here, in insertion order
+        self.ids = {}
+
+
+class PrefixTrie:
+    """
+    Prefix index for completions on the lower-cased values of some fields
+
+    Every element is stored under the value of each field and, for text with several words,
+    under every word too, so "smi" finds "John Smith". Attach it to a repository to keep it
+    in sync. suggest(prefix, limit) walks the subtree of the prefix in alphabetical order of
+    the keys, a key before its longer completions, and stops once it has limit elements.
+    """
+    def __init__(self, fields):
+        self._fields = tuple(fields)
+        self._root = _Node()
+
+    def __keys(self, obj):
+        keys = set()
+        for field in self._fields:
+            value = str(getattr(obj, field)).lower()
+            keys.add(value)
+            keys.update(value.split())
+        keys.discard("")
+        return keys
+
+    def add(self, obj):
+        for key in self.__keys(obj):
+            node = self._root
+            for c in key:
+                child = node.children.get(c)
+                if child is None:
+                    child = node.children[c] = _Node()
+                node = child
+            node.ids[obj.id] = None
+
+    def remove(self, obj):
+        for key in self.__keys(obj):
+            path = [self._root]
+            for c in key:
+                node = path[-1].children.get(c)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                path[-1].ids.pop(obj.id, None)
+                # prune the nodes left without keys
+                for i in range(len(key), 0, -1):
+                    if path[i].ids or path[i].children:
+                        break
+                    del path[i - 1].children[key[i - 1]]
+
+    def clear(self):
+        self._root = _Node()
+
+    def suggest(self, prefix, limit=10):
+        """
+        Ids of the elements having a key that starts with a prefix, ignoring case
+        :param prefix: start of an id or of a word
+        :param limit: most ids returned
+        :return: list of ids, by alphabetical order of their keys
+        """
+        node = self._root
+        for c in prefix.lower():
+            node = node.children.get(c)
+            if node is None:
+                return []
+
+        found = {}
+        stack = [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            for i in node.ids:
+                found[i] = None
+                if len(found) == limit:
+                    break
+            stack.extend(node.children[c] for c in sorted(node.children, reverse=True))
+        return list(found)
@@ -0,0 +1,113 @@
+from src.repository.leaderboard import Leaderboard
+
+import datetime
+
+
+class RentalAggregates:
+    """
+    Rented days and rental count per movie and per client, kept up to date as rentals change
+
+    Attach it to the rental repository: every rental entering or leaving the repository
+    changes the totals of its movie and of its client in O(1), so the totals follow add,
+    update, remove, return and the undo or redo of any of them. Rented days are counted for
+    returned rentals only, between the calendar dates. Movies and clients having rentals are
+    also ranked by rented days in a leaderboard each.
+    """
+    def __init__(self):
+        # id -> [rented days, rental count]
+        self._movies = {}
+        self._clients = {}
+        self._movie_ranking = Leaderboard()
+        self._client_ranking = Leaderboard()
+
+    @staticmethod
+    def rented_days(rental):
+        """
+        Days a returned rental was kept for, 0 for pending rentals
+        """
+        if rental.returned_date == datetime.datetime.min:
+            return 0
+        return rental.returned_date.toordinal() - rental.rented_date.toordinal()
+
+    @staticmethod
+    def __change(totals, ranking, key, days, count):
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = [0, 0]
+        entry[0] += days
+        entry[1] += count
+        if entry[1] == 0:
+            del totals[key]
+            ranking.discard(key)
+        else:
+            ranking.set(key, entry[0])
+
+    def add(self, rental):
+        days = RentalAggregates.rented_days(rental)
+        RentalAggregates.__change(self._movies, self._movie_ranking, rental.movie_id, days, 1)
+        RentalAggregates.__change(self._clients, self._client_ranking, rental.client_id, days, 1)
+
+    def remove(self, rental):
+        days = RentalAggregates.rented_days(rental)
+        RentalAggregates.__change(self._movies, self._movie_ranking, rental.movie_id, -days, -1)
+        RentalAggregates.__change(self._clients, self._client_ranking, rental.client_id, -days, -1)
+
+    def add_totals(self, movies, clients):
+        """
+        Function to merge totals computed elsewhere, such as over a slice of the rentals
+        :param movies: dict of movie id -> [rented days, rental count]
+        :param clients: dict of client id -> [rented days, rental count]
+        :return:
+        """
+        for key, (days, count) in movies.items():
+            RentalAggregates.__change(self._movies, self._movie_ranking, key, days, count)
+        for key, (days, count) in clients.items():
+            RentalAggregates.__change(self._clients, self._client_ranking, key, days, count)
+
+    def clear(self):
+        self._movies.clear()
+        self._clients.clear()
+        self._movie_ranking.clear()
+        self._client_ranking.clear()
+
+    def top_movies(self, k, offset=0):
+        """
+        Function to read a page of the movies ranked by rented days
+        :param k: page size
+        :param offset: rank of the first movie, 0 for the most rented one
+        :return: list of (movie id, rented days)
+        """
+        return self._movie_ranking.top(k, offset)
+
+    def top_clients(self, k, offset=0):
+        """
+        Function to read a page of the clients ranked by rented days
+        :param k: page size
+        :param offset: rank of the first client, 0 for the most active one
+        :return: list of (client id, rented days)
+        """
+        return self._client_ranking.top(k, offset)
+
+    def ranked_movies(self):
+        """
+        Number of movies in the ranking, the ones having rentals
+        """
+        return len(self._movie_ranking)
+
+    def ranked_clients(self):
+        """
+        Number of clients in the ranking, the ones having rentals
+        """
+        return len(self._client_ranking)
+
+    def movie_days(self, m_id):
+        return self._movies.get(m_id, (0, 0))[0]
+
+    def movie_count(self, m_id):
+        return self._movies.get(m_id, (0, 0))[1]
+
+    def client_days(self, c_id):
+        return self._clients.get(c_id, (0, 0))[0]
+
+    def client_count(self, c_id):
+        return self._clients.get(c_id, (0, 0))[1]
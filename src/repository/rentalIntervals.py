@@ -0,0 +1,94 @@
+from src.repository.intervalTree import IntervalTree
+
+import datetime
+
+
+OPEN = datetime.datetime.max.toordinal() + 1
+"""
+End day of the rentals not returned yet
+"""
+
+
+class RentalIntervals:
+    """
+    Rental periods per movie and overall, for availability queries
+
+    A rental keeps its movie out from its rented date up to, but not including, its returned
+    date, with no end while it is not returned. The periods are day ordinals in an interval
+    tree per movie and in one for every movie. Attach it to the rental repository to keep it
+    in sync.
+    """
+    def __init__(self):
+        # movie id -> tree of rental ids
+        self._movies = {}
+        # tree of (movie id, rental id)
+        self._all = IntervalTree()
+
+    @staticmethod
+    def period(rented_date, returned_date):
+        """
+        Days a movie is out for a rental, as [start, end) day ordinals
+        """
+        end = OPEN if returned_date == datetime.datetime.min else returned_date.toordinal()
+        return rented_date.toordinal(), end
+
+    def add(self, rental):
+        start, end = RentalIntervals.period(rental.rented_date, rental.returned_date)
+        tree = self._movies.get(rental.movie_id)
+        if tree is None:
+            tree = self._movies[rental.movie_id] = IntervalTree()
+        tree.insert(start, end, rental.id)
+        self._all.insert(start, end, (rental.movie_id, rental.id))
+
+    def remove(self, rental):
+        start = rental.rented_date.toordinal()
+        tree = self._movies.get(rental.movie_id)
+        if tree is not None:
+            tree.remove(start, rental.id)
+            if not len(tree):
+                del self._movies[rental.movie_id]
+        self._all.remove(start, (rental.movie_id, rental.id))
+
+    def clear(self):
+        self._movies.clear()
+        self._all.clear()
+
+    def is_available(self, m_id, date):
+        """
+        Whether a movie is not out on a date
+        :param m_id: movie id
+        :param date: the date
+        :return: True if no rental of the movie holds the date
+        """
+        tree = self._movies.get(m_id)
+        return tree is None or not tree.meets(date.toordinal(), date.toordinal() + 1)
+
+    def is_free(self, m_id, rented_date, returned_date):
+        """
+        Whether no rental of a movie meets a period
+        :param m_id: movie id
+        :param rented_date: start of the period
+        :param returned_date: end of the period, datetime.min for no end
+        :return: True if the movie can be rented for the period
+        """
+        tree = self._movies.get(m_id)
+        return tree is None or not tree.meets(*RentalIntervals.period(rented_date, returned_date))
+
+    def overlapping(self, m_id, rented_date, returned_date):
+        """
+        Rentals of a movie meeting a period
+        :param m_id: movie id
+        :param rented_date: start of the period
+        :param returned_date: end of the period, datetime.min for no end
+        :return: list of rental ids, by rented date
+        """
+        tree = self._movies.get(m_id)
+        return [] if tree is None else tree.overlap(*RentalIntervals.period(rented_date, returned_date))
+
+    def movies_out(self, date):
+        """
+        Movies out on a date
+        :param date: the date
+        :return: list of movie ids
+        """
+        return list(dict.fromkeys(m_id for m_id, r_id in self._all.stab(date.toordinal())))
@@ -0,0 +1,217 @@
+from array import array
+import datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PENDING = 0
+"""
+Day ordinal stored for the returned date of rentals not returned yet (datetime.min is day 1)
+"""
+
+
+def day_of(date):
+    """
+    Day ordinal of a date, PENDING for datetime.min
+    """
+    return PENDING if date == datetime.datetime.min else date.toordinal()
+
+
+class _Codes:
+    """
+    Dictionary encoding of id strings as small integers
+    """
+    def __init__(self):
+        self._codes = {}
+        self._names = []
+
+    def encode(self, name):
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self._names)
+            self._names.append(name)
+        return code
+
+    def find(self, name):
+        return self._codes.get(name, -1)
+
+    def decode(self, code):
+        return self._names[code]
+
+    def __len__(self):
+        return len(self._names)
+
+
+class RentalTable:
+    """
+    Columnar copy of the rentals of a repository, for analytics
+
+    Every rental is a row spread over six 32-bit integer arrays: the rental id, the movie and client
+    ids (dictionary encoded) and the rented, due and returned dates as day ordinals, PENDING for
+    rentals that were not returned. Numeric rental ids are stored as they are and their rows
+    are found through an array indexed by id, other ids get a negative code and a dict entry.
+    Attach it to the rental repository to keep it in sync.
+    Removing a row moves the last row into its place, so rows have no particular order.
+    The filters work on whole columns, through numpy when it is installed.
+    """
+    COLUMNS = ("id", "movie", "client", "rented", "due", "returned")
+
+    def __init__(self):
+        # codes and day ordinals (at most 3652059) all fit in 32 bits
+        self._columns = {name: array("i") for name in self.COLUMNS}
+        self._movie_ids = _Codes()
+        self._client_ids = _Codes()
+        # numeric rental id -> row, -1 for ids not in the table
+        self._numeric_rows = array("i")
+        # other rental ids, with their codes
+        self._other_ids = _Codes()
+        self._other_rows = {}
+
+    def __len__(self):
+        return len(self._columns["id"])
+
+    def column(self, name):
+        """
+        A column as an array, or as a numpy array when numpy is installed
+        The numpy array is a copy, the table can be changed while it is in use
+        :param name: one of COLUMNS
+        :return: the column values, one per row
+        """
+        if numpy is not None:
+            return numpy.array(self._columns[name], dtype=numpy.int64)
+        return self._columns[name]
+
+    def movie_id(self, code):
+        return self._movie_ids.decode(code)
+
+    def client_id(self, code):
+        return self._client_ids.decode(code)
+
+    def rental_id(self, code):
+        return str(code) if code >= 0 else self._other_ids.decode(-code - 1)
+
+    @property
+    def movie_count(self):
+        """
+        Number of movie codes in use, an upper bound for the movie column
+        """
+        return len(self._movie_ids)
+
+    @property
+    def client_count(self):
+        """
+        Number of client codes in use, an upper bound for the client column
+        """
+        return len(self._client_ids)
+
+    def __numeric(self, rental_id):
+        """
+        The id as a number if it has the form of one, None otherwise
+        """
+        if rental_id in self._other_rows or not rental_id.isdecimal() or str(int(rental_id)) != rental_id:
+            return None
+        return int(rental_id)
+
+    def __set_row(self, code, row):
+        if code >= 0:
+            self._numeric_rows[code] = row
+        else:
+            self._other_rows[self._other_ids.decode(-code - 1)] = row
+
+    def add(self, rental):
+        n = self.__numeric(rental.id)
+        # very sparse ids would make the row array huge
+        if n is not None and n < max(1 << 20, 4 * len(self)):
+            if n >= len(self._numeric_rows):
+                self._numeric_rows.extend([-1] * (n + 1 - len(self._numeric_rows)))
+            code = n
+        else:
+            code = -self._other_ids.encode(rental.id) - 1
+        self.__set_row(code, len(self))
+
+        c = self._columns
+        c["id"].append(code)
+        c["movie"].append(self._movie_ids.encode(rental.movie_id))
+        c["client"].append(self._client_ids.encode(rental.client_id))
+        c["rented"].append(rental.rented_date.toordinal())
+        c["due"].append(rental.due_date.toordinal())
+        c["returned"].append(day_of(rental.returned_date))
+
+    def remove(self, rental):
+        if rental.id in self._other_rows:
+            row = self._other_rows.pop(rental.id)
+        else:
+            n = self.__numeric(rental.id)
+            if n is None or n >= len(self._numeric_rows) or self._numeric_rows[n] == -1:
+                return
+            row = self._numeric_rows[n]
+            self._numeric_rows[n] = -1
+
+        last = len(self) - 1
+        for values in self._columns.values():
+            if row != last:
+                values[row] = values[last]
+            values.pop()
+        if row != last:
+            self.__set_row(self._columns["id"][row], row)
+
+    def clear(self):
+        for values in self._columns.values():
+            del values[:]
+        self._movie_ids = _Codes()
+        self._client_ids = _Codes()
+        self._numeric_rows = array("i")
+        self._other_ids = _Codes()
+        self._other_rows = {}
+
+    def select(self, movie_id=None, client_id=None, returned=None, due_before=None):
+        """
+        Ids of the rentals matching every given condition
+        :param movie_id: only rentals of this movie
+        :param client_id: only rentals of this client
+        :param returned: True for returned rentals only, False for pending ones only
+        :param due_before: only rentals due before this date
+        :return: list of rental ids
+        """
+        conditions = []
+        if movie_id is not None:
+            conditions.append(("movie", "==", self._movie_ids.find(movie_id)))
+        if client_id is not None:
+            conditions.append(("client", "==", self._client_ids.find(client_id)))
+        if returned is not None:
+            conditions.append(("returned", "!=" if returned else "==", PENDING))
+        if due_before is not None:
+            conditions.append(("due", "<", due_before.toordinal()))
+
+        if not len(self):
+            return []
+
+        if numpy is not None:
+            mask = numpy.ones(len(self), dtype=bool)
+            for name, op, value in conditions:
+                values = numpy.frombuffer(self._columns[name], dtype=numpy.int32)
+                if op == "==":
+                    mask &= values == value
+                elif op == "!=":
+                    mask &= values != value
+                else:
+                    mask &= values < value
+                # the view has to go before the array can grow again
+                del values
+            rows = numpy.flatnonzero(mask).tolist()
+        else:
+            rows = range(len(self))
+            for name, op, value in conditions:
+                values = self._columns[name]
+                if op == "==":
+                    rows = [i for i in rows if values[i] == value]
+                elif op == "!=":
+                    rows = [i for i in rows if values[i] != value]
+                else:
+                    rows = [i for i in rows if values[i] < value]
+
+        ids = self._columns["id"]
+        return [self.rental_id(ids[i]) for i in rows]
@@ -1,5 +1,6 @@
 from src.domain.movie import Movie
 from src.repository.collection import Collection
+from src.repository.index import SecondaryIndex
 
 class RepositoryException(Exception):
     """
@@ -8,12 +9,28 @@ class RepositoryException(Exception):
     pass
 
 
+def _elements(objs):
+    return objs
+
+
 class Repository:
     """
     Repository class
     """
-    def __init__(self):
+    def __init__(self, indexes=()):
+        """
+        Constructor
+        :param indexes: names of the fields to keep secondary indexes on, used by lookup
+        """
         self.__data = Collection()
+        self.__indexes = {}
+        self.__attached = []
+        for field in indexes:
+            index = SecondaryIndex(field)
+            self.__indexes[field] = index
+            self.__attached.append(index)
+        # undo log of the running transaction, None outside of transactions
+        self.__log = None
 
     @property
     def data(self):
@@ -23,6 +40,88 @@ class Repository:
     def values(self):
         return self.__data.values
 
+    @property
+    def indexes(self):
+        return dict(self.__indexes)
+
+    @property
+    def in_transaction(self):
+        return self.__log is not None
+
+    def attach(self, index, seed=True):
+        """
+        Function to keep a structure up to date with the elements of the repository
+        :param index: object with add(obj), remove(obj) and clear() methods, it is given every current element
+        :param seed: False if the structure already holds the current elements
+        :return:
+        """
+        if seed:
+            for obj in self.values:
+                index.add(obj)
+        self.__attached.append(index)
+
+    def _index_add(self, obj):
+        for index in self.__attached:
+            index.add(obj)
+        if self.__log is not None:
+            self.__log.append(("added", obj))
+
+    def _index_remove(self, obj):
+        for index in self.__attached:
+            index.remove(obj)
+        if self.__log is not None:
+            self.__log.append(("removed", obj))
+
+    def _reindex(self):
+        """
+        Rebuilds every attached structure from the elements of the repository
+        :return:
+        """
+        if not self.__attached:
+            return
+        for index in self.__attached:
+            index.clear()
+        for obj in self.values:
+            self._index_add(obj)
+
+    def begin(self):
+        """
+        Function to start a transaction, changes made until commit() can be undone by rollback()
+        :return:
+        """
+        if self.__log is not None:
+            raise RepositoryException("A transaction is already in progress")
+        self.__log = []
+
+    def commit(self):
+        """
+        Function to end a transaction, keeping its changes
+        :return:
+        """
+        if self.__log is None:
+            raise RepositoryException("No transaction in progress")
+        self.__log = None
+
+    def rollback(self):
+        """
+        Function to end a transaction, undoing its changes
+        :return:
+        """
+        if self.__log is None:
+            raise RepositoryException("No transaction in progress")
+        log, self.__log = self.__log, None
+        for entry in reversed(log):
+            if entry[0] == "added":
+                for index in self.__attached:
+                    index.remove(entry[1])
+            elif entry[0] == "removed":
+                for index in self.__attached:
+                    index.add(entry[1])
+            elif entry[2] is None:
+                del self.__data[entry[1]]
+            else:
+                self.__data[entry[1]] = entry[2]
+
     def add_element(self, obj):
         """
         Function to add elements to a repository
@@ -31,7 +130,46 @@ class Repository:
         """
         if self.__data.has_element(obj):
             raise RepositoryException(f"Object with Id {str(obj.id)} already exists in repository")
-        self.__data.add(obj.id, obj)
+        self.__set(obj.id, obj)
+
+    def add_many(self, objs):
+        """
+        Function to add several elements at once
+        Nothing is added if any of the ids is already in use or appears twice
+        :param objs: iterable of objects
+        :return:
+        """
+        objs = list(objs)
+        ids = set()
+        for obj in objs:
+            if obj.id in ids or self.__data.has_element(obj):
+                raise RepositoryException(f"Object with Id {str(obj.id)} already exists in repository")
+            ids.add(obj.id)
+        for obj in objs:
+            self.__set(obj.id, obj)
+
+    def update_many(self, objs):
+        """
+        Function to replace several elements at once, each by the object with its id
+        :param objs: iterable of objects
+        :return:
+        """
+        for obj in objs:
+            self.__set(obj.id, obj)
+
+    def delete_many(self, keys):
+        """
+        Function to remove several elements at once
+        Nothing is removed if any of the ids is not in the repository
+        :param keys: iterable of ids
+        :return:
+        """
+        keys = list(dict.fromkeys(keys))
+        for key in keys:
+            if not self.__data.has_id(key):
+                raise KeyError(key)
+        for key in keys:
+            self.__delete(key)
 
     def has_element(self, i_id):
         """
@@ -41,6 +179,50 @@ class Repository:
         """
         return self.__data.has_id(i_id)
 
+    def lookup(self, field, value):
+        """
+        Function to find the elements with a given value for a field
+        Uses the secondary index on the field if there is one, otherwise checks every element
+        :param field: name of the attribute to check
+        :param value: value to look for
+        :return: list of the matching elements
+        """
+        if field in self.__indexes:
+            return [self.__data[i] for i in self.__indexes[field].get(value)]
+        return [x for x in self.__data.values if getattr(x, field) == value]
+
+    def scan(self, predicate=None, fields=None):
+        """
+        Function to go over the elements matching some conditions, one at a time
+        A condition on the id reads that element only, one on an indexed field uses the index
+        :param predicate: function telling whether an element is wanted, None for every element
+        :param fields: dict of field name -> value the wanted elements have
+        :return: generator of the matching elements
+        """
+        fields = dict(fields or {})
+        indexed = [f for f in fields if f in self.indexes]
+        if "id" in fields:
+            key = fields.pop("id")
+            candidates = [self[key]] if self.has_element(key) else []
+        elif indexed:
+            candidates = self.lookup(indexed[0], fields.pop(indexed[0]))
+        else:
+            candidates = self.values
+        for obj in candidates:
+            if all(getattr(obj, f) == v for f, v in fields.items()) and (predicate is None or predicate(obj)):
+                yield obj
+
+    def partitions(self, n):
+        """
+        Function to split the elements into slices that can be read in other processes
+        The in-memory elements are split into row ranges, sent along with the slices
+        :param n: number of slices wanted, there can be fewer
+        :return: list of (function, args), function(*args) gives the elements of a slice
+        """
+        values = list(self.values)
+        size = max(1, -(-len(values) // max(n, 1)))
+        return [(_elements, (values[i:i + size],)) for i in range(0, len(values), size)]
+
     """
     [] access built-in methods
     """
@@ -48,10 +230,26 @@ class Repository:
         return self.__data[item]
 
     def __setitem__(self, key, value):
-        self.__data[key] = value
+        self.__set(key, value)
 
     def __delitem__(self, key):
+        self.__delete(key)
+
+    def __set(self, key, value):
+        old = self.__data[key] if self.__data.has_id(key) else None
+        if self.__log is not None:
+            self.__log.append(("data", key, old))
+        if old is not None:
+            self._index_remove(old)
+        self.__data[key] = value
+        self._index_add(value)
+
+    def __delete(self, key):
+        obj = self.__data[key]
+        if self.__log is not None:
+            self.__log.append(("data", key, obj))
         del self.__data[key]
+        self._index_remove(obj)
 
     def __str__(self):
         s = ""
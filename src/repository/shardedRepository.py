@@ -0,0 +1,179 @@
+from src.repository.repository import Repository
+from src.repository.textLoader import read_elements
+
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import os
+import re
+import zlib
+
+
+def shard_of(key, shards):
+    """
+    Shard holding a key, stable across runs (unlike hash() of a string)
+    :param key: id of an element
+    :param shards: number of shards
+    :return: shard number
+    """
+    return zlib.crc32(key.encode("utf-8")) % shards
+
+
+def _read_shard(file_name, entity_type):
+    return list(read_elements(file_name, entity_type))
+
+
+class _ShardKeys:
+    """
+    Ids held by every shard, kept up to date as an index of the repository
+    """
+    def __init__(self, shards):
+        self._keys = [dict() for _ in range(shards)]
+
+    def add(self, obj):
+        self._keys[shard_of(obj.id, len(self._keys))][obj.id] = None
+
+    def remove(self, obj):
+        self._keys[shard_of(obj.id, len(self._keys))].pop(obj.id, None)
+
+    def clear(self):
+        for keys in self._keys:
+            keys.clear()
+
+    def __getitem__(self, shard):
+        return self._keys[shard]
+
+
+class ShardedRepository(Repository):
+    """
+    Text file repository partitioned by id hash into several files
+
+    For "rentals.txt" the elements are stored in "rentals.0.txt", "rentals.1.txt", ... with the
+    same line format as FileRepository. Elements are kept in memory and a change rewrites only
+    the shard of the changed id. On startup the shards are parsed by up to `workers` processes.
+    Shard files written with a different number of shards are redistributed when loaded.
+    """
+    def __init__(self, file_name, entity_type, shards=8, workers=1, indexes=()):
+        self._entity_type = entity_type
+        super().__init__(indexes)
+        self._fileName = file_name[1:len(file_name)-1]
+        self._shards = shards
+        self._workers = workers
+        self._shard_keys = _ShardKeys(shards)
+        # shards changed by the running transaction, None outside of transactions
+        self._tx_shards = None
+        self.attach(self._shard_keys)
+
+        self.__load()
+
+    @property
+    def shards(self):
+        return self._shards
+
+    def shard_file(self, shard):
+        base, ext = os.path.splitext(self._fileName)
+        return f"{base}.{shard}{ext}"
+
+    def __existing_files(self):
+        base, ext = os.path.splitext(self._fileName)
+        pattern = re.compile(re.escape(base) + r"\.(\d+)" + re.escape(ext) + "$")
+        files = {}
+        for name in glob.glob(glob.escape(base) + ".*" + glob.escape(ext)):
+            m = pattern.match(name)
+            if m:
+                files[int(m.group(1))] = name
+        return files
+
+    def __load(self):
+        files = self.__existing_files()
+        shards = sorted(files)
+        if self._workers > 1 and len(shards) > 1:
+            with ProcessPoolExecutor(min(self._workers, len(shards))) as pool:
+                parts = list(pool.map(_read_shard, [files[i] for i in shards],
+                                      [self._entity_type] * len(shards)))
+        else:
+            parts = [_read_shard(files[i], self._entity_type) for i in shards]
+
+        moved = set()
+        for shard, objs in zip(shards, parts):
+            for obj in objs:
+                super().data.add(obj.id, obj)
+                target = shard_of(obj.id, self._shards)
+                if target != shard:
+                    moved.update((shard, target))
+        self._reindex()
+
+        if moved:
+            self.__write_shards(moved)
+            for shard in shards:
+                if shard >= self._shards:
+                    os.remove(files[shard])
+
+    def __write_shards(self, shards):
+        """
+        Rewrites the given shards, or marks them for commit() inside a transaction
+        """
+        if self._tx_shards is not None:
+            self._tx_shards.update(shards)
+            return
+
+        data = super().data
+        for shard in shards:
+            if shard >= self._shards:
+                continue
+            tmp = self.shard_file(shard) + ".tmp"
+            with open(tmp, "wt") as f:
+                f.writelines(self._entity_type.get_string_form(data[key]) + "\n" for key in self._shard_keys[shard])
+            os.replace(tmp, self.shard_file(shard))
+
+    def __shards(self, keys):
+        return {shard_of(key, self._shards) for key in keys}
+
+    def begin(self):
+        super().begin()
+        self._tx_shards = set()
+
+    def commit(self):
+        super().commit()
+        shards, self._tx_shards = self._tx_shards, None
+        self.__write_shards(shards)
+
+    def rollback(self):
+        super().rollback()
+        self._tx_shards = None
+
+    def partitions(self, n):
+        """
+        The slices are the shard files, read by the other processes, n is not used
+        Inside a transaction the files are not up to date and the in-memory elements are split instead
+        """
+        if self._tx_shards is not None:
+            return super().partitions(n)
+        files = [self.shard_file(shard) for shard in range(self._shards)]
+        return [(_read_shard, (name, self._entity_type)) for name in files if os.path.exists(name)]
+
+    def add_element(self, obj):
+        super().add_element(obj)
+        self.__write_shards(self.__shards([obj.id]))
+
+    def add_many(self, objs):
+        objs = list(objs)
+        super().add_many(objs)
+        self.__write_shards(self.__shards(obj.id for obj in objs))
+
+    def update_many(self, objs):
+        objs = list(objs)
+        super().update_many(objs)
+        self.__write_shards(self.__shards(obj.id for obj in objs))
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        super().delete_many(keys)
+        self.__write_shards(self.__shards(keys))
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.__write_shards(self.__shards([key]))
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.__write_shards(self.__shards([key]))
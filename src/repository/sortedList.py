@@ -0,0 +1,97 @@
+from bisect import bisect_left, insort
+
+
+class SortedList:
+    """
+    Entries kept in ascending order, for many inserts and removes in any order
+
+    The entries are kept in a list of blocks of at most 2 * _LOAD entries, with the last entry
+    of every block in a separate list to find blocks by bisection, so an insert or a remove
+    moves the entries of one block instead of the whole list. The entries must be comparable.
+    """
+    _LOAD = 512
+
+    def __init__(self):
+        self._blocks = []
+        self._maxes = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for block in self._blocks:
+            yield from block
+
+    def add(self, entry):
+        self._len += 1
+        if not self._blocks:
+            self._blocks.append([entry])
+            self._maxes.append(entry)
+            return
+        i = min(bisect_left(self._maxes, entry), len(self._blocks) - 1)
+        block = self._blocks[i]
+        insort(block, entry)
+        self._maxes[i] = block[-1]
+        if len(block) > 2 * self._LOAD:
+            self._blocks[i + 1:i + 1] = [block[self._LOAD:]]
+            del block[self._LOAD:]
+            self._maxes[i:i + 1] = [block[-1], self._blocks[i + 1][-1]]
+
+    def remove(self, entry):
+        """
+        Function to remove an entry, if it is there
+        :param entry: the entry
+        :return:
+        """
+        i = bisect_left(self._maxes, entry)
+        if i == len(self._blocks):
+            return
+        block = self._blocks[i]
+        j = bisect_left(block, entry)
+        if block[j] != entry:
+            return
+        del block[j]
+        self._len -= 1
+        if block:
+            self._maxes[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+
+    def clear(self):
+        self._blocks = []
+        self._maxes = []
+        self._len = 0
+
+    def before(self, value):
+        """
+        Entries lower than a value
+        :return: list of entries, ascending
+        """
+        result = []
+        for i, block in enumerate(self._blocks):
+            if self._maxes[i] < value:
+                result.extend(block)
+            else:
+                result.extend(block[:bisect_left(block, value)])
+                break
+        return result
+
+    def page(self, k, offset=0):
+        """
+        Function to read consecutive entries, skipping whole blocks up to offset
+        :param k: number of entries
+        :param offset: position of the first one
+        :return: list of entries, ascending
+        """
+        result = []
+        for block in self._blocks:
+            if offset >= len(block):
+                offset -= len(block)
+                continue
+            result.extend(block[offset:offset + k - len(result)])
+            offset = 0
+            if len(result) == k:
+                break
+        return result
@@ -0,0 +1,191 @@
+from src.repository.repository import Repository, RepositoryException
+from src.repository.collection import Collection
+
+import atexit
+import sqlite3
+
+
+class SqliteRepository(Repository):
+    """
+    SQLite database repository
+
+    Every entity type gets its own table, with one column per value of the entity's row form.
+    Each change is a single statement on its own row, lookups are answered by the database
+    using the indexes declared for the table, as are the named queries declared for it, run by
+    query(). Changes made between begin() and commit() are one database transaction.
+    """
+    _TABLES = {
+        "Movie": ("movies", ("id TEXT PRIMARY KEY", "title TEXT", "description TEXT", "genre TEXT"), (), {}),
+        "Client": ("clients", ("id TEXT PRIMARY KEY", "name TEXT"), (), {}),
+        "Rental": ("rentals", ("id TEXT PRIMARY KEY", "movie_id TEXT", "client_id TEXT", "rented_date INTEGER",
+                               "due_date INTEGER", "returned_date INTEGER"), ("client_id", "movie_id", ("client_id", "returned_date", "due_date")),
+                   {"client_overdue": "client_id = ? AND returned_date = ? AND due_date < ? ORDER BY due_date, id"}),
+    }
+
+    def __init__(self, file_name, entity_type):
+        super().__init__()
+        self._entity_type = entity_type
+        self._fileName = file_name[1:len(file_name)-1]
+
+        table, columns, indexes, queries = SqliteRepository._TABLES[entity_type.__name__]
+        self._columns = [c.split(" ")[0] for c in columns]
+        self._connection = sqlite3.connect(self._fileName)
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})")
+        # an index is on a column or on a tuple of columns
+        for columns in indexes:
+            columns = (columns,) if isinstance(columns, str) else columns
+            self._connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_{'_'.join(columns)} "
+                                     f"ON {table} ({', '.join(columns)})")
+        self._connection.commit()
+
+        # the statements are built once so sqlite keeps them prepared in its statement cache
+        places = ", ".join("?" for _ in self._columns)
+        self._select_all = f"SELECT * FROM {table}"
+        self._select = f"SELECT * FROM {table} WHERE id = ?"
+        self._exists = f"SELECT 1 FROM {table} WHERE id = ?"
+        self._insert = f"INSERT INTO {table} VALUES ({places})"
+        self._replace = f"INSERT OR REPLACE INTO {table} VALUES ({places})"
+        self._delete = f"DELETE FROM {table} WHERE id = ?"
+        self._where = {c: f"SELECT * FROM {table} WHERE {c} = ?" for c in self._columns}
+        self._queries = {name: f"SELECT * FROM {table} WHERE {where}" for name, where in queries.items()}
+
+        atexit.register(self.close)
+
+    @property
+    def data(self):
+        c = Collection()
+        for obj in self.values:
+            c.add(obj.id, obj)
+        return c
+
+    @property
+    def values(self):
+        return [self._entity_type.get_from_row(row) for row in self._connection.execute(self._select_all)]
+
+    def query(self, name, *params):
+        """
+        Function to run one of the queries declared for the table
+        :param name: name of the query
+        :param params: its parameters, as in the row form
+        :return: list of the matching elements
+        """
+        if name not in self._queries:
+            raise RepositoryException(f"Unknown query {name}")
+        return [self._entity_type.get_from_row(row) for row in self._connection.execute(self._queries[name], params)]
+
+    def __write(self, sql, params, many=False):
+        """
+        Runs a change statement, committed right away unless a transaction is in progress
+        """
+        run = self._connection.executemany if many else self._connection.execute
+        if self.in_transaction:
+            return run(sql, params)
+        with self._connection:
+            return run(sql, params)
+
+    def commit(self):
+        # a failed commit leaves the transaction open, for rollback()
+        self._connection.commit()
+        super().commit()
+
+    def rollback(self):
+        self._connection.rollback()
+        super().rollback()
+
+    def close(self):
+        self._connection.close()
+        atexit.unregister(self.close)
+
+    def add_element(self, obj):
+        try:
+            self.__write(self._insert, self._entity_type.get_row_form(obj))
+        except sqlite3.IntegrityError:
+            raise RepositoryException(f"Object with Id {str(obj.id)} already exists in repository")
+        self._index_add(obj)
+
+    def add_many(self, objs):
+        objs = list(objs)
+        try:
+            self.__write(self._insert, [self._entity_type.get_row_form(obj) for obj in objs], many=True)
+        except sqlite3.IntegrityError:
+            ids = set()
+            for obj in objs:
+                if obj.id in ids or self.has_element(obj.id):
+                    raise RepositoryException(f"Object with Id {str(obj.id)} already exists in repository")
+                ids.add(obj.id)
+            raise
+        for obj in objs:
+            self._index_add(obj)
+
+    def update_many(self, objs):
+        objs = list({obj.id: obj for obj in objs}.values())
+        old = [self._entity_type.get_from_row(row) for row in
+               (self._connection.execute(self._select, (obj.id,)).fetchone() for obj in objs) if row is not None]
+        self.__write(self._replace, [self._entity_type.get_row_form(obj) for obj in objs], many=True)
+        for obj in old:
+            self._index_remove(obj)
+        for obj in objs:
+            self._index_add(obj)
+
+    def delete_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        old = []
+        for key in keys:
+            row = self._connection.execute(self._select, (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            old.append(self._entity_type.get_from_row(row))
+        self.__write(self._delete, [(key,) for key in keys], many=True)
+        for obj in old:
+            self._index_remove(obj)
+
+    def has_element(self, i_id):
+        return self._connection.execute(self._exists, (i_id,)).fetchone() is not None
+
+    def lookup(self, field, value):
+        if field not in self._where:
+            return super().lookup(field, value)
+        rows = self._connection.execute(self._where[field], (value,))
+        return [self._entity_type.get_from_row(row) for row in rows]
+
+    def scan(self, predicate=None, fields=None):
+        """
+        The conditions on text columns are part of the query, the rows are read as the elements are used
+        """
+        fields = dict(fields or {})
+        columns = [c for c in fields if c in self._columns and isinstance(fields[c], str)]
+        sql = self._select_all
+        if columns:
+            sql += " WHERE " + " AND ".join(f"{c} = ?" for c in columns)
+        # a cursor of its own, the rows are fetched while the generator runs
+        cursor = self._connection.cursor().execute(sql, [fields.pop(c) for c in columns])
+        for row in cursor:
+            obj = self._entity_type.get_from_row(row)
+            if all(getattr(obj, f) == v for f, v in fields.items()) and (predicate is None or predicate(obj)):
+                yield obj
+
+    def __getitem__(self, item):
+        row = self._connection.execute(self._select, (item,)).fetchone()
+        if row is None:
+            raise KeyError(item)
+        return self._entity_type.get_from_row(row)
+
+    def __setitem__(self, key, value):
+        row = self._connection.execute(self._select, (key,)).fetchone()
+        self.__write(self._replace, self._entity_type.get_row_form(value))
+        if row is not None:
+            self._index_remove(self._entity_type.get_from_row(row))
+        self._index_add(value)
+
+    def __delitem__(self, key):
+        row = self._connection.execute(self._select, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        self.__write(self._delete, (key,))
+        self._index_remove(self._entity_type.get_from_row(row))
+
+    def __str__(self):
+        s = ""
+        for i in self.values:
+            s += str(i) + "\n\n"
+        return s
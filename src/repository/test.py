@@ -0,0 +1,787 @@
+import unittest
+from unittest import mock
+
+from src.repository.binaryRepository import BinaryRepository
+from src.repository.bloomFilter import BloomFilter
+from src.repository.cachedRepository import CachedRepository, size_of
+from src.repository.collection import Collection
+from src.repository.dueDateIndex import DueDateIndex
+from src.repository.fileRepository import FileRepository
+from src.repository.idAllocator import IdAllocator
+from src.repository.intervalTree import IntervalTree
+from src.repository.journalRepository import JournalRepository
+from src.repository.leaderboard import Leaderboard
+from src.repository.prefixTrie import PrefixTrie
+from src.repository.rentalAggregates import RentalAggregates
+from src.repository.rentalIntervals import RentalIntervals
+from src.repository.rentalTable import RentalTable, PENDING
+from src.repository import rentalTable
+from src.repository.repository import Repository, RepositoryException
+from src.repository.shardedRepository import ShardedRepository, shard_of
+from src.repository.sqliteRepository import SqliteRepository
+from src.repository.textLoader import read_elements
+from src.repository.trigramIndex import TrigramIndex
+from src.repository.unitOfWork import UnitOfWork
+
+from src.domain.client import Client
+from src.domain.movie import Movie
+from src.domain.rental import Rental
+
+import datetime
+
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+class TestCollection(unittest.TestCase):
+    def test_iteration(self):
+        c = Collection()
+        for i in range(5):
+            c.add(str(i), i)
+        self.assertEqual(list(c), [0, 1, 2, 3, 4])
+
+        with self.assertRaises(RuntimeError):
+            for i in c:
+                del c[str(i)]
+
+        c["1"] = 10
+        snapshot = c.snapshot()
+        self.assertEqual(next(snapshot), 10)
+        del c["2"]
+        c["3"] = 30
+        c.add("5", 5)
+        self.assertEqual(list(snapshot), [2, 3, 4])
+        self.assertEqual(list(c), [10, 30, 4, 5])
+
+        # only snapshots still being read make a change copy the elements
+        data = c._data
+        self.assertEqual(list(c.snapshot()), [10, 30, 4, 5])
+        c["6"] = 6
+        snapshot = c.snapshot()
+        del snapshot
+        c["7"] = 7
+        self.assertIs(c._data, data)
+        snapshot = c.snapshot()
+        c["8"] = 8
+        self.assertIsNot(c._data, data)
+        self.assertEqual(list(snapshot), [10, 30, 4, 5, 6, 7])
+
+
+class TestSecondaryIndex(unittest.TestCase):
+    def test_lookup(self):
+        day = datetime.datetime(2020, 1, 1)
+        r = Repository(["client_id", "movie_id"])
+        r.add_element(Rental(1, 1, 5, day, day, day))
+        r.add_element(Rental(2, 2, 5, day, day, day))
+        r.add_element(Rental(3, 2, 6, day, day, day))
+        self.assertEqual([x.id for x in r.lookup("client_id", "5")], ["1", "2"])
+
+        r["2"] = Rental(2, 2, 6, day, day, day)
+        del r["3"]
+        self.assertEqual([x.id for x in r.lookup("client_id", "5")], ["1"])
+        self.assertEqual([x.id for x in r.lookup("client_id", "6")], ["2"])
+        self.assertEqual([x.id for x in r.lookup("movie_id", "2")], ["2"])
+        self.assertEqual(r.lookup("movie_id", "3"), [])
+        # fields without an index are scanned
+        self.assertEqual([x.id for x in r.lookup("rented_date", day)], ["1", "2"])
+
+
+class TestRentalTable(unittest.TestCase):
+    def _check(self):
+        day = datetime.datetime(2020, 1, 1)
+        r = Repository()
+        t = RentalTable()
+        r.add_element(Rental(1, 1, 5, day, day, datetime.datetime.min))
+        r.attach(t)
+        r.add_many([Rental(2, 2, 5, day, day, day), Rental(3, 2, 6, day, day, day)])
+        self.assertEqual(sorted(t.select(client_id="5")), ["1", "2"])
+        self.assertEqual(t.select(client_id="5", returned=False), ["1"])
+        self.assertEqual(t.select(due_before=day + datetime.timedelta(days=1), returned=False), ["1"])
+        self.assertEqual(t.select(movie_id="9"), [])
+
+        del r["1"]
+        r["2"] = Rental(2, 3, 5, day, day, datetime.datetime.min)
+        self.assertEqual(len(t), 2)
+        self.assertEqual(sorted(t.select(returned=True)), ["3"])
+        self.assertEqual(t.select(movie_id="3"), ["2"])
+        self.assertEqual(sorted(t.column("returned")), [PENDING, day.toordinal()])
+
+        # 32-bit columns, also once cleared
+        for _ in range(2):
+            self.assertEqual({a.typecode for a in [*t._columns.values(), t._numeric_rows]}, {"i"})
+            t.clear()
+
+    def test_select(self):
+        self._check()
+
+    def test_select_without_numpy(self):
+        numpy = rentalTable.numpy
+        rentalTable.numpy = None
+        self.addCleanup(setattr, rentalTable, "numpy", numpy)
+        self._check()
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def test_search(self):
+        r = Repository()
+        index = TrigramIndex("title")
+        r.add_element(Movie(1, "The Dark Night", "d", "g"))
+        r.attach(index)
+        r.add_many([Movie(2, "Darkness", "d", "g"), Movie(3, "Night Of The Living", "d", "g"),
+                    Movie(4, "Abcd Bcde", "d", "g")])
+        self.assertEqual(index.search("DARK"), ["1", "2"])
+        self.assertEqual(index.search("night"), ["1", "3"])
+        self.assertEqual(index.search("k n"), ["1"])
+        self.assertEqual(index.search("ht"), ["1", "3"])
+        self.assertEqual(index.search("darkest"), [])
+        # every trigram of the query is there, but not the query itself
+        self.assertEqual(index.search("abcde"), [])
+
+        r["2"] = Movie(2, "Light", "d", "g")
+        del r["1"]
+        self.assertEqual(index.search("dark"), [])
+        self.assertEqual(index.search("ight"), ["3", "2"])
+
+
+class TestPrefixTrie(unittest.TestCase):
+    def test_suggest(self):
+        r = Repository()
+        trie = PrefixTrie(("id", "name"))
+        r.add_element(Client(12, "Anna Smith"))
+        r.attach(trie)
+        r.add_many([Client(1, "John Smithson"), Client(2, "Ann Lee"), Client(3, "Smit Annabel")])
+        self.assertEqual(trie.suggest("ann"), ["2", "12", "3"])
+        self.assertEqual(trie.suggest("SMITH"), ["12", "1"])
+        self.assertEqual(trie.suggest("1"), ["1", "12"])
+        self.assertEqual(trie.suggest("ann", 2), ["2", "12"])
+        self.assertEqual(trie.suggest("x"), [])
+
+        r["2"] = Client(2, "Bob Lee")
+        del r["12"]
+        self.assertEqual(trie.suggest("ann"), ["3"])
+        self.assertEqual(trie.suggest("1"), ["1"])
+        self.assertEqual(trie._root.children["a"].children["n"].children["n"].children.keys(), {"a"})
+
+
+class TestDueDateIndex(unittest.TestCase):
+    def test_overdue(self):
+        day = datetime.datetime(2020, 1, 1)
+        week = datetime.timedelta(days=7)
+        r = Repository()
+        due = DueDateIndex()
+        r.add_element(Rental(1, 1, 5, day, day + week, datetime.datetime.min))
+        r.attach(due)
+        r.add_many([Rental(2, 1, 6, day, day, datetime.datetime.min), Rental(3, 2, 5, day, day, day),
+                    Rental(4, 2, 5, day, day + 2 * week, datetime.datetime.min)])
+        self.assertEqual(due.overdue(day + week), [(day, "2")])
+        self.assertEqual([i for d, i in due.overdue(day + 3 * week)], ["2", "1", "4"])
+        self.assertEqual([i for d, i in due.client_overdue("5", day + 3 * week)], ["1", "4"])
+        self.assertEqual(due.client_earliest_due("5"), day + week)
+        self.assertTrue(due.client_has_overdue("5", day + 2 * week))
+        self.assertFalse(due.client_has_overdue("5", day + week))
+        self.assertEqual(due.client_overdue_count("5", day + 3 * week), 2)
+
+        # returned, then unreturned
+        r["1"] = Rental(1, 1, 5, day, day + week, day)
+        self.assertEqual([i for d, i in due.client_overdue("5", day + 3 * week)], ["4"])
+        r["1"] = Rental(1, 1, 5, day, day + week, datetime.datetime.min)
+        del r["2"]
+        self.assertEqual([i for d, i in due.overdue(day + 3 * week)], ["1", "4"])
+        self.assertEqual(due.client_overdue("6", day + 3 * week), [])
+        self.assertEqual((due.client_earliest_due("6"), due.client_has_overdue("6", day + week)), (None, False))
+
+
+class TestTextLoader(unittest.TestCase):
+    def test_chunks(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        name = os.path.join(directory.name, "rentals.txt")
+        day = datetime.datetime(2020, 1, 1)
+        rentals = [Rental(i, i % 3, i % 5, day, day, datetime.datetime.min if i % 2 else day) for i in range(50)]
+        with open(name, "wt") as f:
+            f.write("\n".join(Rental.get_string_form(r) for r in rentals) + "\n\n")
+
+        expected = [Rental.get_string_form(r) for r in rentals]
+        for chunk_size in (7, 64, 1 << 20):
+            loaded = list(read_elements(name, Rental, chunk_size))
+            self.assertEqual([Rental.get_string_form(r) for r in loaded], expected)
+        self.assertEqual(list(read_elements(os.path.join(directory.name, "new.txt"), Rental)), [])
+
+
+class TestIdAllocator(unittest.TestCase):
+    def test_allocate(self):
+        d = tempfile.TemporaryDirectory()
+        self.addCleanup(d.cleanup)
+        path = os.path.join(d.name, "clients.ids")
+        r = Repository()
+        r.add_many([Client(1, "Ann"), Client(5, "Bob"), Client("x9", "Cid")])
+        ids = IdAllocator(path)
+        r.attach(ids)
+        self.assertEqual(ids.next_id(), "6")
+        self.assertEqual(ids.reserve(3), ["7", "8", "9"])
+        r.add_element(Client(12, "Dan"))
+        ids.release(["8", "9"])
+        r.add_element(Client(9, "Eve"))
+        self.assertEqual(ids.reserve(2), ["8", "13"])
+
+        # the mark outlives the elements, so ids are not handed out twice after a restart
+        del r["12"]
+        ids.release(["13"])
+        ids = IdAllocator(path)
+        r.attach(ids)
+        self.assertEqual(ids.reserve(2), ["13", "14"])
+        self.assertRaises(ValueError, ids.reserve, -1)
+
+
+class TestIntervalTree(unittest.TestCase):
+    def test_queries(self):
+        random.seed(3)
+        tree = IntervalTree()
+        intervals = {}
+        for i in range(300):
+            start = random.randint(0, 500)
+            intervals[i] = (start, start + random.randint(0, 40))
+            tree.insert(*intervals[i], i)
+        for i in range(0, 300, 3):
+            tree.remove(intervals.pop(i)[0], i)
+        tree.remove(1000, 1)
+        self.assertEqual(len(tree), len(intervals))
+
+        for start, end in ((0, 1), (100, 130), (250, 251), (490, 600), (700, 800)):
+            expected = sorted((s, i) for i, (s, e) in intervals.items() if s < end and e > start)
+            self.assertEqual(tree.overlap(start, end), [i for s, i in expected])
+            self.assertEqual(tree.meets(start, end), bool(expected))
+        self.assertEqual(tree.stab(100), tree.overlap(100, 101))
+
+
+class TestRentalIntervals(unittest.TestCase):
+    def test_availability(self):
+        day = datetime.datetime(2020, 1, 1)
+        week = datetime.timedelta(days=7)
+        r = Repository()
+        intervals = RentalIntervals()
+        r.add_element(Rental(1, 1, 5, day, day + week, day + week))
+        r.attach(intervals)
+        r.add_many([Rental(2, 1, 6, day + 2 * week, day + 3 * week, datetime.datetime.min),
+                    Rental(3, 2, 5, day, day + week, day + 2 * week)])
+        self.assertFalse(intervals.is_available("1", day))
+        self.assertTrue(intervals.is_available("1", day + week))
+        self.assertFalse(intervals.is_available("1", day + 50 * week))
+        self.assertTrue(intervals.is_free("1", day + week, day + 2 * week))
+        self.assertFalse(intervals.is_free("1", day + week, datetime.datetime.min))
+        self.assertEqual(intervals.overlapping("1", day, datetime.datetime.min), ["1", "2"])
+        self.assertEqual(intervals.movies_out(day + week), ["2"])
+
+        # returned
+        r["2"] = Rental(2, 1, 6, day + 2 * week, day + 3 * week, day + 3 * week)
+        self.assertTrue(intervals.is_available("1", day + 50 * week))
+        del r["3"]
+        self.assertEqual(intervals.movies_out(day + week), [])
+
+
+class TestLeaderboard(unittest.TestCase):
+    def test_top(self):
+        board = Leaderboard()
+        board._entries._LOAD = 2
+        for i in range(20):
+            board.set(str(i), i % 7)
+        board.set("3", 10)
+        board.discard("13")
+        board.discard("99")
+        expected = sorted(((str(i), 10 if i == 3 else i % 7) for i in range(20) if i != 13),
+                          key=lambda e: (-e[1], e[0]))
+        self.assertEqual(board.top(100), expected)
+        self.assertEqual(board.top(3), [("3", 10), ("6", 6), ("12", 5)])
+        self.assertEqual(board.top(4, 8), expected[8:12])
+        self.assertEqual(board.top(5, 17), expected[17:])
+        self.assertEqual(len(board), 19)
+
+
+class TestRentalAggregates(unittest.TestCase):
+    def test_totals(self):
+        day = datetime.datetime(2020, 1, 1)
+        r = Repository()
+        a = RentalAggregates()
+        r.add_element(Rental(1, 1, 5, day, day, day + datetime.timedelta(days=3)))
+        r.attach(a)
+        r.add_many([Rental(2, 1, 6, day, day, datetime.datetime.min), Rental(3, 2, 5, day, day, day)])
+        self.assertEqual((a.movie_days("1"), a.movie_count("1")), (3, 2))
+        self.assertEqual((a.client_days("5"), a.client_count("5")), (3, 2))
+
+        r["2"] = Rental(2, 1, 6, day, day, day + datetime.timedelta(days=4))
+        self.assertEqual((a.movie_days("1"), a.client_days("6")), (7, 4))
+        r.begin()
+        del r["1"]
+        self.assertEqual((a.movie_days("1"), a.movie_count("1")), (4, 1))
+        r.rollback()
+        self.assertEqual((a.movie_days("1"), a.movie_count("1")), (7, 2))
+        self.assertEqual(a.top_movies(5), [("1", 7), ("2", 0)])
+        del r["3"]
+        self.assertEqual((a.movie_days("2"), a.movie_count("2")), (0, 0))
+        self.assertEqual(a.top_clients(5), [("6", 4), ("5", 3)])
+        self.assertEqual(a.top_movies(5, 1), [])
+
+
+class RepositoryTypes(unittest.TestCase):
+    """
+    Base for the tests run on every repository type
+    """
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def _repositories(self):
+        path = os.path.join(self._dir.name, "clients")
+        yield Repository(["name"])
+        yield FileRepository(f'"{path}.txt"', Client, indexes=["name"])
+        yield ShardedRepository(f'"{path}.sharded.txt"', Client, 3, indexes=["name"])
+        for r in (JournalRepository(f'"{path}.journal.txt"', Client, indexes=["name"]),
+                  BinaryRepository(f'"{path}.pkl"', ["name"]),
+                  SqliteRepository(f'"{path}.db"', Client),
+                  CachedRepository(BinaryRepository(f'"{path}.cached.pkl"', ["name"]), 3)):
+            self.addCleanup(r.close)
+            yield r
+
+
+class TestBatches(RepositoryTypes):
+    def test_batches(self):
+        for r in self._repositories():
+            r.add_many([Client(i, "Ann") for i in range(5)])
+            with self.assertRaises(RepositoryException):
+                r.add_many([Client(5, "Bob"), Client(6, "Bob"), Client(5, "Bob")])
+            with self.assertRaises(RepositoryException):
+                r.add_many([Client(7, "Bob"), Client(1, "Bob")])
+            self.assertFalse(r.has_element("5"))
+            self.assertFalse(r.has_element("7"))
+
+            r.update_many([Client(1, "Bob"), Client(2, "Bob")])
+            with self.assertRaises(KeyError):
+                r.delete_many(["3", "9"])
+            r.delete_many(["3", "4"])
+            self.assertEqual(sorted(x.id for x in r.values), ["0", "1", "2"])
+            self.assertEqual(sorted(x.id for x in r.lookup("name", "Bob")), ["1", "2"])
+
+
+class TestScan(RepositoryTypes):
+    def test_scan(self):
+        for r in self._repositories():
+            r.add_many([Client(i, "Ann" if i % 3 else "Bob") for i in range(1, 10)])
+            with self.subTest(repository=type(r).__name__):
+                self.assertEqual(sorted(x.id for x in r.scan(fields={"name": "Bob"})), ["3", "6", "9"])
+                self.assertEqual(sorted(x.id for x in r.scan(lambda x: x.id > "6", {"name": "Ann"})), ["7", "8"])
+                self.assertEqual([x.id for x in r.scan(fields={"id": "5", "name": "Ann"})], ["5"])
+                self.assertEqual(list(r.scan(fields={"id": "5", "name": "Bob"})), [])
+                self.assertEqual(list(r.scan(fields={"id": "50"})), [])
+                self.assertEqual(sorted(x.id for x in r.scan(lambda x: x.id < "3")), ["1", "2"])
+                self.assertEqual(len(list(r.scan())), 9)
+
+
+class TestPartitions(RepositoryTypes):
+    def test_partitions(self):
+        for r in self._repositories():
+            with self.subTest(type(r).__name__):
+                r.add_many([Client(i, f"Name {i}") for i in range(100)])
+                parts = r.partitions(4)
+                self.assertLessEqual(len(parts), 4 if not isinstance(r, ShardedRepository) else r.shards)
+                read = [obj.id for reader, args in parts for obj in reader(*args)]
+                self.assertEqual(sorted(read), sorted(str(i) for i in range(100)))
+
+
+class TestTransactions(RepositoryTypes):
+    def test_transactions(self):
+        for r in self._repositories():
+            r.add_many([Client(i, "Ann") for i in range(3)])
+
+            r.begin()
+            r.add_element(Client(3, "Bob"))
+            r["0"] = Client(0, "Bob")
+            del r["1"]
+            self.assertTrue(r.has_element("3"))
+            self.assertFalse(r.has_element("1"))
+            self.assertEqual(sorted(x.id for x in r.lookup("name", "Bob")), ["0", "3"])
+            r.rollback()
+
+            self.assertEqual(sorted(x.id for x in r.values), ["0", "1", "2"])
+            self.assertEqual(sorted(x.id for x in r.lookup("name", "Ann")), ["0", "1", "2"])
+            self.assertEqual(r.lookup("name", "Bob"), [])
+
+            with self.assertRaises(KeyError):
+                with UnitOfWork(r):
+                    del r["2"]
+                    del r["5"]
+            self.assertTrue(r.has_element("2"))
+
+            with UnitOfWork(r):
+                r.add_element(Client(3, "Bob"))
+                del r["2"]
+            self.assertEqual(sorted(x.id for x in r.values), ["0", "1", "3"])
+            self.assertEqual(r["3"].name, "Bob")
+
+    def test_failed_commit(self):
+        paths = [os.path.join(self._dir.name, f"clients{i}.txt") for i in range(3)]
+        repositories = [FileRepository(f'"{path}"', Client) for path in paths]
+        uow = UnitOfWork(*repositories)
+        uow.begin()
+        for r in repositories:
+            r.add_element(Client(1, "Ann"))
+        # the second file cannot be written
+        os.remove(paths[1])
+        os.mkdir(paths[1])
+        with self.assertRaises(OSError):
+            uow.commit()
+        self.assertEqual([r.in_transaction for r in repositories], [False, False, False])
+        self.assertTrue(repositories[0].has_element("1"))
+        self.assertFalse(repositories[2].has_element("1"))
+
+        repositories[2].add_element(Client(2, "Bob"))
+        self.assertTrue(FileRepository(f'"{paths[2]}"', Client).has_element("2"))
+        with UnitOfWork(repositories[0], repositories[2]):
+            repositories[2].add_element(Client(3, "Cid"))
+        self.assertTrue(repositories[2].has_element("3"))
+
+        # a file that cannot be read leaves no transaction behind
+        with self.assertRaises(OSError):
+            repositories[1].begin()
+        self.assertFalse(repositories[1].in_transaction)
+
+    def test_single_write(self):
+        path = os.path.join(self._dir.name, "clients.txt")
+        r = FileRepository(f'"{path}"', Client)
+        r.add_many([Client(i, "Ann") for i in range(3)])
+        r.begin()
+        for i in range(3):
+            del r[str(i)]
+        with open(path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+        r.commit()
+        with open(path) as f:
+            self.assertEqual(f.readlines(), [])
+
+
+class TestCachedRepository(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def test_cache(self):
+        binary = BinaryRepository(f'"{os.path.join(self._dir.name, "clients.pkl")}"', ["name"])
+        self.addCleanup(binary.close)
+        r = CachedRepository(binary, max_entries=2)
+        binary.add_many([Client(i, "Ann") for i in range(1, 5)])
+
+        c = r["1"]
+        self.assertIs(r["1"], c)
+        self.assertEqual((r.hits, r.misses), (1, 1))
+        r["2"], r["3"]
+        self.assertEqual((r.cached, r.evictions), (2, 1))
+        self.assertIsNot(r["1"], c)
+        self.assertEqual((r.hits, r.misses), (1, 4))
+        self.assertIs(r.lookup("name", "Ann")[0], r["1"])
+
+        r["1"] = Client(1, "Bob")
+        self.assertEqual(binary["1"].name, "Bob")
+        self.assertIs(next(r.scan(fields={"name": "Bob"})), r["1"])
+        r.begin()
+        del r["1"]
+        self.assertFalse(r.has_element("1"))
+        r.rollback()
+        self.assertEqual((r["1"].name, r.cached), ("Bob", 1))
+
+    def test_bytes(self):
+        r = CachedRepository(Repository(), max_bytes=3 * size_of(Client(1, "Ann")))
+        r.add_many([Client(i, "Ann") for i in range(1, 10)])
+        self.assertEqual(r.cached, 3)
+        self.assertLessEqual(r.cached_bytes, 3 * size_of(Client(1, "Ann")))
+        self.assertEqual([r[str(i)].id for i in range(1, 10)], [str(i) for i in range(1, 10)])
+
+
+class TestShardedRepository(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self._path = os.path.join(self._dir.name, "clients.txt")
+
+    def _shard(self, shard):
+        with open(os.path.join(self._dir.name, f"clients.{shard}.txt")) as f:
+            return f.readlines()
+
+    def test_shards(self):
+        r = ShardedRepository(f'"{self._path}"', Client, 4)
+        r.add_many([Client(i, "Ann") for i in range(20)])
+        for shard in range(4):
+            self.assertEqual(len(self._shard(shard)), len([i for i in range(20) if shard_of(str(i), 4) == shard]))
+
+        # a change only rewrites its own shard
+        before = {shard: os.path.getmtime(r.shard_file(shard)) for shard in range(4)}
+        r["7"] = Client(7, "Bob")
+        self.assertIn("7,Bob\n", self._shard(shard_of("7", 4)))
+        for shard in range(4):
+            if shard != shard_of("7", 4):
+                self.assertEqual(os.path.getmtime(r.shard_file(shard)), before[shard])
+
+        r = ShardedRepository(f'"{self._path}"', Client, 4, workers=2)
+        self.assertEqual(len(r.values), 20)
+        self.assertEqual(r["7"].name, "Bob")
+
+        # loading with another shard count redistributes the elements
+        r = ShardedRepository(f'"{self._path}"', Client, 2)
+        self.assertEqual(len(r.values), 20)
+        self.assertFalse(os.path.exists(os.path.join(self._dir.name, "clients.3.txt")))
+        r = ShardedRepository(f'"{self._path}"', Client, 2)
+        self.assertEqual(sorted(int(x.id) for x in r.values), list(range(20)))
+
+
+class TestFileRepository(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self._path = os.path.join(self._dir.name, "clients.txt")
+
+    def _lines(self):
+        with open(self._path) as f:
+            return [line.strip() for line in f if line.strip()]
+
+    def test_direct(self):
+        r = FileRepository(f'"{self._path}"', Client)
+        r.add_element(Client(1, "Ann"))
+        r.add_element(Client(2, "Bob"))
+        self.assertEqual(self._lines(), ["1,Ann", "2,Bob"])
+
+        r["2"] = Client(2, "Bobby")
+        del r["1"]
+        self.assertEqual(self._lines(), ["2,Bobby"])
+        self.assertTrue(r.has_element("2"))
+        self.assertFalse(r.has_element("1"))
+
+        r = FileRepository(f'"{self._path}"', Client, indexes=["name"])
+        self.assertEqual([x.id for x in r.lookup("name", "Bobby")], ["2"])
+        r.add_element(Client(3, "Bobby"))
+        self.assertEqual([x.id for x in r.lookup("name", "Bobby")], ["2", "3"])
+
+    def test_bloom_filter(self):
+        f = BloomFilter(100)
+        clients = [Client(i, "Ann") for i in range(100)]
+        for c in clients:
+            f.add(c)
+        self.assertTrue(all(f.might_contain(c.id) for c in clients))
+        self.assertLess(sum(f.might_contain(str(i)) for i in range(100, 10100)), 300)
+        for c in clients[:50]:
+            f.remove(c)
+        self.assertTrue(all(f.might_contain(c.id) for c in clients[50:]))
+        self.assertLess(sum(f.might_contain(c.id) for c in clients[:50]), 5)
+
+        r = FileRepository(f'"{self._path}"', Client)
+        r.add_many(clients)
+        r.begin()
+        del r["7"]
+        self.assertFalse(r.has_element("7"))
+        r.rollback()
+        self.assertTrue(r.has_element("7"))
+        # a missing id is answered by the saved filter, without reading the file
+        with mock.patch("src.repository.fileRepository.read_elements", side_effect=AssertionError):
+            r = FileRepository(f'"{self._path}"', Client)
+            self.assertFalse(r.has_element("100"))
+        self.assertTrue(r.has_element("7"))
+
+        # the filter is rebuilt once the file changes behind it
+        with open(self._path, "a") as f:
+            f.write("100,Bob\n")
+        r = FileRepository(f'"{self._path}"', Client)
+        self.assertTrue(r.has_element("100"))
+        r.add_many([Client(i, "Bob") for i in range(101, 3000)])
+        self.assertEqual(BloomFilter.load(self._path + ".bloom", BloomFilter.stamp(self._path)).capacity, 2 * 3000)
+
+    def test_writeback(self):
+        r = FileRepository(f'"{self._path}"', Client, "writeback", flush_ops=3)
+        self.addCleanup(r.close)
+        r.add_element(Client(1, "Ann"))
+        r.add_element(Client(2, "Bob"))
+        self.assertEqual(self._lines(), [])
+        self.assertEqual(r.dirty, {"1", "2"})
+        self.assertEqual(r["2"].name, "Bob")
+
+        r["1"] = Client(1, "Annie")
+        self.assertEqual(self._lines(), ["1,Annie", "2,Bob"])
+        self.assertEqual(r.dirty, set())
+
+        del r["2"]
+        r.flush()
+        self.assertEqual(self._lines(), ["1,Annie"])
+
+        r = FileRepository(f'"{self._path}"', Client, "writeback")
+        self.addCleanup(r.close)
+        self.assertEqual(r["1"].name, "Annie")
+
+    def test_flush_interval(self):
+        r = FileRepository(f'"{self._path}"', Client, "writeback", flush_interval=0.05)
+        self.addCleanup(r.close)
+        r.add_element(Client(1, "Ann"))
+        self.assertEqual(self._lines(), [])
+        # flushed by the timer, with no further change
+        for _ in range(100):
+            if not r.dirty:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self._lines(), ["1,Ann"])
+
+        # a flush for another reason cancels the timer
+        r.add_element(Client(2, "Bob"))
+        timer = r._timer
+        r.flush()
+        self.assertIsNone(r._timer)
+        self.assertTrue(timer.finished.is_set())
+
+
+class TestJournalRepository(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self._path = os.path.join(self._dir.name, "clients.txt")
+
+    def _open(self, **kwargs):
+        r = JournalRepository(f'"{self._path}"', Client, **kwargs)
+        self.addCleanup(r.close)
+        return r
+
+    def test_replay(self):
+        r = self._open(compact_ratio=10)
+        r.add_element(Client(1, "Ann"))
+        r.add_element(Client(2, "Bob"))
+        r["1"] = Client(1, "Annie")
+        del r["2"]
+        r.close()
+
+        with open(self._path + ".journal") as f:
+            self.assertEqual(f.readlines(), ["A,1,Ann\n", "A,2,Bob\n", "U,1,Annie\n", "D,2\n"])
+
+        # an append cut short by a crash is ignored
+        with open(self._path + ".journal", "a") as f:
+            f.write("A,3,Ca")
+
+        r = self._open()
+        self.assertEqual(r["1"].name, "Annie")
+        self.assertFalse(r.has_element("2"))
+        self.assertFalse(r.has_element("3"))
+
+        # and does not run into the records appended after it
+        r.add_element(Client(3, "Cid"))
+        r.close()
+        r = self._open()
+        self.assertEqual(sorted((x.id, x.name) for x in r.values), [("1", "Annie"), ("3", "Cid")])
+
+    def test_compact(self):
+        r = self._open(compact_size=10 ** 6, compact_ratio=2)
+        for i in range(5):
+            r.add_element(Client(i, "Ann"))
+        for i in range(6):
+            r["0"] = Client(0, f"Ann{i}")
+        r.close()
+
+        with open(self._path) as f:
+            self.assertEqual(len(f.readlines()), 5)
+        self.assertFalse(os.path.exists(self._path + ".journal.old"))
+
+        r = self._open()
+        self.assertEqual(r["0"].name, "Ann5")
+        self.assertTrue(r.journal_size < 20)
+
+        # a compaction that is over before compact() gets to wait for it
+        start = threading.Thread.start
+        with mock.patch.object(threading.Thread, "start", lambda t: (start(t), t.join())):
+            r["1"] = Client(1, "Bob")
+            r.compact(wait=True)
+        self.assertIsNone(r._compactor)
+        self.assertEqual(r.journal_size, 0)
+
+
+class TestBinaryRepository(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self._path = os.path.join(self._dir.name, "clients.pkl")
+
+    def _open(self):
+        r = BinaryRepository(f'"{self._path}"')
+        self.addCleanup(r.close)
+        return r
+
+    def test_records(self):
+        r = self._open()
+        r.add_element(Client(1, "Ann"))
+        r.add_element(Client(2, "Bob"))
+        r["1"] = Client(1, "Annie")
+        del r["2"]
+        self.assertEqual(r["1"].name, "Annie")
+        self.assertFalse(r.has_element("2"))
+        self.assertTrue(r.dead_bytes > 0)
+        with self.assertRaises(RepositoryException):
+            r.add_element(Client(1, "Ann"))
+        r.close()
+
+        r = self._open()
+        self.assertEqual([c.name for c in r.values], ["Annie"])
+
+        # records written after the saved index are picked up again
+        r.add_element(Client(3, "Cid"))
+        r._file.close()
+        r = self._open()
+        self.assertEqual(r["3"].name, "Cid")
+
+    def test_vacuum(self):
+        r = self._open()
+        for i in range(10):
+            r[str(i % 2)] = Client(i % 2, f"Ann{i}")
+        size = os.path.getsize(self._path)
+        r.vacuum()
+        self.assertEqual(r.dead_bytes, 0)
+        self.assertTrue(os.path.getsize(self._path) < size)
+        self.assertEqual(r["0"].name, "Ann8")
+        self.assertEqual(r["1"].name, "Ann9")
+
+
+class TestSqliteRepository(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self._path = os.path.join(self._dir.name, "rentals.db")
+
+    def _open(self):
+        r = SqliteRepository(f'"{self._path}"', Rental)
+        self.addCleanup(r.close)
+        return r
+
+    def test_rentals(self):
+        day = datetime.datetime(2020, 1, 1)
+        r = self._open()
+        r.add_element(Rental(1, 1, 5, day, day, datetime.datetime.min))
+        r.add_element(Rental(2, 2, 5, day, day, day))
+        r.add_element(Rental(3, 2, 6, day, day, day))
+        with self.assertRaises(RepositoryException):
+            r.add_element(Rental(3, 2, 6, day, day, day))
+
+        r["1"] = Rental(1, 3, 5, day, day, datetime.datetime.min)
+        del r["3"]
+        with self.assertRaises(KeyError):
+            del r["3"]
+        r.close()
+
+        r = self._open()
+        self.assertEqual(r["1"].movie_id, "3")
+        self.assertEqual(r["1"].returned_date, datetime.datetime.min)
+        self.assertEqual(sorted(x.id for x in r.lookup("client_id", "5")), ["1", "2"])
+        self.assertEqual(r.lookup("movie_id", "2")[0].id, "2")
+        self.assertFalse(r.has_element("3"))
+
+        r.add_element(Rental(4, 4, 5, day, day + datetime.timedelta(days=9), datetime.datetime.min))
+        pending = datetime.datetime.min.toordinal()
+        self.assertEqual([x.id for x in r.query("client_overdue", "5", pending, day.toordinal() + 1)], ["1"])
+        self.assertEqual([x.id for x in r.query("client_overdue", "5", pending, day.toordinal() + 10)], ["1", "4"])
+        with self.assertRaises(RepositoryException):
+            r.query("missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+
+
+CHUNK_SIZE = 1 << 20
+"""
+Characters read from a text file at a time
+"""
+
+
+def _batches(file_name, chunk_size):
+    """
+    Non empty lines of a text file, a list per chunk read
+    """
+    with open(file_name, "a+") as f:
+        f.seek(0)
+        rest = ""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines = (rest + chunk).split("\n")
+            # the last line may go on in the next chunk
+            rest = lines.pop()
+            yield [line for line in lines if line]
+        if rest:
+            yield [rest]
+
+
+def read_elements(file_name, entity_type, chunk_size=CHUNK_SIZE):
+    """
+    Elements of a text file with one element per line, read in chunks
+    Every chunk becomes a batch of elements built by entity_type.get_many_from_strings
+    :param file_name: the file, created empty when missing
+    :param entity_type: class of the elements
+    :param chunk_size: characters read at a time
+    :return: generator of elements, in file order
+    """
+    for lines in _batches(file_name, chunk_size):
+        yield from entity_type.get_many_from_strings(lines)
+
+
+def file_ranges(file_name, parts):
+    """
+    Byte ranges splitting a text file into about equal runs of whole lines
+    :param file_name: the file
+    :param parts: number of ranges wanted, there can be fewer
+    :return: list of (start, end) offsets
+    """
+    if not os.path.exists(file_name):
+        return []
+    size = os.path.getsize(file_name)
+    bounds = [0]
+    with open(file_name, "rb") as f:
+        for i in range(1, parts):
+            f.seek(size * i // parts)
+            # a range ends with the line the split point falls in
+            f.readline()
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def read_range(file_name, entity_type, start, end):
+    """
+    Elements of a byte range of a text file, as given by file_ranges
+    :param file_name: the file
+    :param entity_type: class of the elements
+    :param start: offset of the first line
+    :param end: offset past the last line
+    :return: list of elements, in file order
+    """
+    with open(file_name, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    return entity_type.get_many_from_strings([line for line in text.split("\n") if line.strip()])
+
+
+def scan_elements(file_name, entity_type, predicate=None, fields=None, chunk_size=CHUNK_SIZE):
+    """
+    Elements of a text file matching some conditions, read in chunks
+    The string values of fields are compared with the columns of the split lines, so only the
+    matching lines are turned into elements
+    :param file_name: the file, created empty when missing
+    :param entity_type: class of the elements, FIELDS gives the order of its columns
+    :param predicate: function telling whether an element is wanted, None for every element
+    :param fields: dict of field name -> value the wanted elements have
+    :param chunk_size: characters read at a time
+    :return: generator of the matching elements, in file order
+    """
+    fields = dict(fields or {})
+    columns = []
+    for field in list(fields):
+        if field in entity_type.FIELDS and isinstance(fields[field], str):
+            columns.append((entity_type.FIELDS.index(field), fields.pop(field)))
+
+    for lines in _batches(file_name, chunk_size):
+        if columns:
+            lines = [line for line in lines if _has_columns(line.strip().split(","), columns)]
+        for obj in entity_type.get_many_from_strings(lines):
+            if all(getattr(obj, f) == v for f, v in fields.items()) and (predicate is None or predicate(obj)):
+                yield obj
+
+
+def _has_columns(values, columns):
+    for i, value in columns:
+        if values[i] != value:
+            return False
+    return True
@@ -0,0 +1,69 @@
+class TrigramIndex:
+    """
+    Case-insensitive substring index on one text field
+
+    Every element is listed under each three character sequence of its lower-cased field.
+    A query of three characters or more only looks at the elements listed under all of its
+    trigrams, and keeps those whose field does contain the query. Shorter queries go over
+    the lower-cased fields held by the index. Attach it to a repository to keep it in sync.
+    """
+    def __init__(self, field):
+        self._field = field
+        # trigram -> set of ids
+        self._postings = {}
+        # id -> (insertion number, lower-cased field), the number keeps results in insertion order
+        self._texts = {}
+        self._count = 0
+
+    @property
+    def field(self):
+        return self._field
+
+    @staticmethod
+    def trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, obj):
+        text = str(getattr(obj, self._field)).lower()
+        self._texts[obj.id] = (self._count, text)
+        self._count += 1
+        for t in TrigramIndex.trigrams(text):
+            self._postings.setdefault(t, set()).add(obj.id)
+
+    def remove(self, obj):
+        entry = self._texts.pop(obj.id, None)
+        if entry is None:
+            return
+        for t in TrigramIndex.trigrams(entry[1]):
+            ids = self._postings[t]
+            ids.discard(obj.id)
+            if not ids:
+                del self._postings[t]
+
+    def clear(self):
+        self._postings.clear()
+        self._texts.clear()
+
+    def search(self, s):
+        """
+        Ids of the elements whose field contains a string, ignoring case
+        :param s: string to look for
+        :return: list of ids, in insertion order
+        """
+        s = s.lower()
+        if len(s) < 3:
+            return [i for i, (n, text) in self._texts.items() if s in text]
+
+        postings = []
+        for t in TrigramIndex.trigrams(s):
+            ids = self._postings.get(t)
+            if ids is None:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+
+        found = [self._texts[i] + (i,) for i in candidates]
+        found = [e for e in found if s in e[1]]
+        found.sort()
+        return [e[2] for e in found]
@@ -0,0 +1,51 @@
+class UnitOfWork:
+    """
+    Transaction spanning several repositories
+
+    begin() starts a transaction on every repository, commit() writes each of them once and
+    rollback() undoes the changes made since begin(). Used as a context manager it commits
+    when the block ends normally and rolls back when it raises.
+    Every repository commits on its own, so a failure while writing one file does not undo
+    the files already committed before it, the repositories after it are rolled back.
+    """
+    def __init__(self, *repositories):
+        self._repositories = repositories
+
+    def begin(self):
+        started = []
+        try:
+            for r in self._repositories:
+                if not r.in_transaction:
+                    started.append(r)
+                r.begin()
+        except Exception:
+            # including the one that failed, if it was left in a transaction
+            for r in started:
+                if r.in_transaction:
+                    r.rollback()
+            raise
+
+    def commit(self):
+        for i, r in enumerate(self._repositories):
+            try:
+                r.commit()
+            except Exception:
+                for rest in self._repositories[i:]:
+                    if rest.in_transaction:
+                        rest.rollback()
+                raise
+
+    def rollback(self):
+        for r in self._repositories:
+            r.rollback()
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
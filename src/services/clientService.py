@@ -1,6 +1,13 @@
 from src.repository.repository import Repository
 from src.repository.fileRepository import FileRepository
 from src.repository.binaryRepository import BinaryRepository
+from src.repository.journalRepository import JournalRepository
+from src.repository.sqliteRepository import SqliteRepository
+from src.repository.shardedRepository import ShardedRepository
+from src.repository.cachedRepository import CachedRepository
+from src.repository.trigramIndex import TrigramIndex
+from src.repository.prefixTrie import PrefixTrie
+from src.repository.idAllocator import IdAllocator
 
 import random
 from src.domain.client import Client
@@ -15,9 +22,29 @@ class ClientService:
         if settings.repo_type == "inmemory":
             self.__data = Repository()
         elif settings.repo_type == "file":
-            self.__data = FileRepository(settings.client_file, Client)
+            self.__data = FileRepository(settings.client_file, Client, settings.file_mode,
+                                         settings.flush_ops, settings.flush_interval)
+        elif settings.repo_type == "journal":
+            self.__data = JournalRepository(settings.client_file, Client, settings.journal_compact_size,
+                                            settings.journal_compact_ratio)
         elif settings.repo_type == "binary":
             self.__data = BinaryRepository(settings.client_file)
+        elif settings.repo_type == "sharded":
+            self.__data = ShardedRepository(settings.client_file, Client, settings.shards, settings.shard_workers)
+        elif settings.repo_type == "sqlite":
+            self.__data = SqliteRepository(settings.client_file, Client)
+
+        if settings.repo_type != "inmemory" and (settings.cache_entries or settings.cache_bytes):
+            self.__data = CachedRepository(self.__data, settings.cache_entries, settings.cache_bytes)
+
+        # substring search indexes, by field, and completions on ids and names
+        self.__text = {field: TrigramIndex(field) for field in ("id", "name")}
+        for index in self.__text.values():
+            self.__data.attach(index)
+        self.__trie = PrefixTrie(("id", "name"))
+        self.__data.attach(self.__trie)
+        self.__ids = IdAllocator(None if settings.repo_type == "inmemory" else settings.client_file[1:-1] + ".ids")
+        self.__data.attach(self.__ids)
 
         self.populate()
 
@@ -28,10 +55,13 @@ class ClientService:
     def add(self, elem):
         """
         Function to add a client
-        :param elem: client to add, instance of the Client class
-        :return:
+        :param elem: client to add, instance of the Client class, an empty id is replaced by the next free one
+        :return: the added client
         """
+        if elem.id == "":
+            elem = Client.trusted(self.__ids.next_id(), elem.name)
         self.__data.add_element(elem)
+        return elem
 
     def update(self, updated):
         """
@@ -49,6 +79,49 @@ class ClientService:
         """
         del self.__data[r_id]
 
+    def add_many(self, elems):
+        """
+        Function to add several clients with a single write to the repository
+        :param elems: iterable of clients to add, empty ids are replaced by free ones
+        :return: list of the added clients
+        """
+        elems = list(elems)
+        ids = iter(self.__ids.reserve(sum(1 for e in elems if e.id == "")))
+        elems = [Client.trusted(next(ids), e.name) if e.id == "" else e for e in elems]
+        self.__data.add_many(elems)
+        return elems
+
+    def update_many(self, updated):
+        """
+        Function to update several clients with a single write to the repository
+        :param updated: iterable of updated objects
+        :return:
+        """
+        self.__data.update_many(updated)
+
+    def remove_many(self, r_ids):
+        """
+        Function to remove several clients with a single write to the repository
+        :param r_ids: iterable of ids to remove
+        :return:
+        """
+        self.__data.delete_many(r_ids)
+
+    def next_id(self):
+        """
+        Function to get an id no client has
+        :return: the id
+        """
+        return self.__ids.next_id()
+
+    def reserve(self, n):
+        """
+        Function to get ids no client has, for adding a batch
+        :param n: number of ids
+        :return: list of ids
+        """
+        return self.__ids.reserve(n)
+
     def has_item(self, i_id):
         """
         has_item wrapper for the service
@@ -65,19 +138,19 @@ class ClientService:
         return str(self.__data)
 
     def search_id(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() in elem.id.lower():
-                ls.append(elem)
-        return ls
+        return [self.__data[i] for i in self.__text["id"].search(s)]
 
     def search_name(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() in elem.name.lower():
-                ls.append(elem)
+        return [self.__data[i] for i in self.__text["name"].search(s)]
 
-        return ls
+    def suggest(self, prefix, limit=10):
+        """
+        Function to complete the start of a client id or of a word of a client name
+        :param prefix: what was typed so far
+        :param limit: most clients returned
+        :return: list of clients, in alphabetical order of the matched id or word
+        """
+        return [self.__data[i] for i in self.__trie.suggest(prefix, limit)]
 
     def populate(self):
         """
@@ -87,7 +160,9 @@ class ClientService:
                    "Walter Monaghan", "Lionel Suchet", "Tony Hill", "Turner Corney", "Josh Stevens",
                    "Jane Hand", "Lenna Ming", "Filomena Heriot", "Arrie Delagney", "Hertha Lamb",
                    "Inga Middlemiss", "Leola Ruth", "Mellie Baldry", "Winnie Fergusson", "Josephine Griffin"]
+        ls = []
         for i in range(1, 21):
             c = Client(i, random.choice(choices))
             choices.remove(c.name)
-            self.add(c)
+            ls.append(c)
+        self.add_many(ls)
@@ -1,6 +1,12 @@
 from src.repository.repository import Repository
 from src.repository.fileRepository import FileRepository
 from src.repository.binaryRepository import BinaryRepository
+from src.repository.journalRepository import JournalRepository
+from src.repository.sqliteRepository import SqliteRepository
+from src.repository.shardedRepository import ShardedRepository
+from src.repository.cachedRepository import CachedRepository
+from src.repository.trigramIndex import TrigramIndex
+from src.repository.idAllocator import IdAllocator
 
 import random
 from src.domain.movie import Movie
@@ -15,9 +21,27 @@ class MovieService:
         if settings.repo_type == "inmemory":
             self.__data = Repository()
         elif settings.repo_type == "file":
-            self.__data = FileRepository(settings.movies_file, Movie)
+            self.__data = FileRepository(settings.movies_file, Movie, settings.file_mode,
+                                         settings.flush_ops, settings.flush_interval)
+        elif settings.repo_type == "journal":
+            self.__data = JournalRepository(settings.movies_file, Movie, settings.journal_compact_size,
+                                            settings.journal_compact_ratio)
         elif settings.repo_type == "binary":
             self.__data = BinaryRepository(settings.movies_file)
+        elif settings.repo_type == "sharded":
+            self.__data = ShardedRepository(settings.movies_file, Movie, settings.shards, settings.shard_workers)
+        elif settings.repo_type == "sqlite":
+            self.__data = SqliteRepository(settings.movies_file, Movie)
+
+        if settings.repo_type != "inmemory" and (settings.cache_entries or settings.cache_bytes):
+            self.__data = CachedRepository(self.__data, settings.cache_entries, settings.cache_bytes)
+
+        # substring search indexes, by field
+        self.__text = {field: TrigramIndex(field) for field in ("id", "title", "description", "genre")}
+        for index in self.__text.values():
+            self.__data.attach(index)
+        self.__ids = IdAllocator(None if settings.repo_type == "inmemory" else settings.movies_file[1:-1] + ".ids")
+        self.__data.attach(self.__ids)
 
         self.populate()
 
@@ -28,10 +52,13 @@ class MovieService:
     def add(self, elem):
         """
         Function to add a movie
-        :param elem: Movie to add, instance of the Movie class
-        :return:
+        :param elem: Movie to add, instance of the Movie class, an empty id is replaced by the next free one
+        :return: the added movie
         """
+        if elem.id == "":
+            elem = Movie.trusted(self.__ids.next_id(), elem.title, elem.description, elem.genre)
         self.__data.add_element(elem)
+        return elem
 
     def update(self, updated):
         """
@@ -49,6 +76,49 @@ class MovieService:
         """
         del self.__data[r_id]
 
+    def add_many(self, elems):
+        """
+        Function to add several movies with a single write to the repository
+        :param elems: iterable of movies to add, empty ids are replaced by free ones
+        :return: list of the added movies
+        """
+        elems = list(elems)
+        ids = iter(self.__ids.reserve(sum(1 for e in elems if e.id == "")))
+        elems = [Movie.trusted(next(ids), e.title, e.description, e.genre) if e.id == "" else e for e in elems]
+        self.__data.add_many(elems)
+        return elems
+
+    def update_many(self, updated):
+        """
+        Function to update several movies with a single write to the repository
+        :param updated: iterable of updated objects
+        :return:
+        """
+        self.__data.update_many(updated)
+
+    def remove_many(self, r_ids):
+        """
+        Function to remove several movies with a single write to the repository
+        :param r_ids: iterable of ids to remove
+        :return:
+        """
+        self.__data.delete_many(r_ids)
+
+    def next_id(self):
+        """
+        Function to get an id no movie has
+        :return: the id
+        """
+        return self.__ids.next_id()
+
+    def reserve(self, n):
+        """
+        Function to get ids no movie has, for adding a batch
+        :param n: number of ids
+        :return: list of ids
+        """
+        return self.__ids.reserve(n)
+
     def has_item(self, i_id):
         """
         has_item wrapper for the service
@@ -64,37 +134,26 @@ class MovieService:
         """
         return str(self.__data)
 
-    def search_id(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() in elem.id.lower():
-                ls.append(elem)
+    def __search(self, field, s):
+        """
+        Function to find the movies with a field containing a string, ignoring case
+        :param field: name of the field
+        :param s: string to look for
+        :return: list of movies
+        """
+        return [self.__data[i] for i in self.__text[field].search(s)]
 
-        return ls
+    def search_id(self, s):
+        return self.__search("id", s)
 
     def search_title(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() in elem.title.lower():
-                ls.append(elem)
-
-        return ls
+        return self.__search("title", s)
 
     def search_genre(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() in elem.genre.lower():
-                ls.append(elem)
-
-        return ls
+        return self.__search("genre", s)
 
     def search_desc(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() in elem.description.lower():
-                ls.append(elem)
-
-        return ls
+        return self.__search("description", s)
 
     def populate(self):
         name_choices = ["Invader Of Our Ship", "Invader Of Exploration", "Hunter In The News", "Boy Of The Orbit",
@@ -105,9 +164,11 @@ class MovieService:
                         "Broken The Armies", "Failure Of A Nuclear War", "Anxious For The Secrets",
                         "Puzzle Of", "Crazy Of The Troopers"]
         genre_choices = ["action", "comedy", "sci-fi", "romance", "drama", "thriller", "horror"]
+        ls = []
         for i in range(1, 21):
             name = random.choice(name_choices)
             name_choices.remove(name)
             genre = random.choice(genre_choices)
             m = Movie(i, name, f"Generic Description {i}", genre)
-            self.add(m)
+            ls.append(m)
+        self.add_many(ls)
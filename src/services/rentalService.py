@@ -4,6 +4,15 @@ from src.domain.rental import Rental
 from src.repository.repository import Repository
 from src.repository.fileRepository import FileRepository
 from src.repository.binaryRepository import BinaryRepository
+from src.repository.journalRepository import JournalRepository
+from src.repository.sqliteRepository import SqliteRepository
+from src.repository.shardedRepository import ShardedRepository
+from src.repository.cachedRepository import CachedRepository
+from src.repository.rentalTable import RentalTable
+from src.repository.rentalAggregates import RentalAggregates
+from src.repository.dueDateIndex import DueDateIndex
+from src.repository.rentalIntervals import RentalIntervals
+from src.repository.idAllocator import IdAllocator
 
 import datetime
 
@@ -14,12 +23,43 @@ class RentalService:
     """
 
     def __init__(self, settings):
+        indexes = ["client_id", "movie_id"]
         if settings.repo_type == "inmemory":
-            self.__data = Repository()
+            self.__data = Repository(indexes)
         elif settings.repo_type == "file":
-            self.__data = FileRepository(settings.rental_file, Rental)
+            self.__data = FileRepository(settings.rental_file, Rental, settings.file_mode,
+                                         settings.flush_ops, settings.flush_interval, indexes)
+        elif settings.repo_type == "journal":
+            self.__data = JournalRepository(settings.rental_file, Rental, settings.journal_compact_size,
+                                            settings.journal_compact_ratio, indexes)
         elif settings.repo_type == "binary":
-            self.__data = BinaryRepository(settings.rental_file)
+            self.__data = BinaryRepository(settings.rental_file, indexes)
+        elif settings.repo_type == "sharded":
+            self.__data = ShardedRepository(settings.rental_file, Rental, settings.shards,
+                                            settings.shard_workers, indexes)
+        elif settings.repo_type == "sqlite":
+            # the rentals table has its own indexes on client_id, movie_id and the overdue rentals of a client
+            self.__data = SqliteRepository(settings.rental_file, Rental)
+        # the database answers the overdue rentals of a client itself
+        self.__sqlite = self.__data if settings.repo_type == "sqlite" else None
+
+        if settings.repo_type != "inmemory" and (settings.cache_entries or settings.cache_bytes):
+            self.__data = CachedRepository(self.__data, settings.cache_entries, settings.cache_bytes)
+
+        self.__aggregates = RentalAggregates()
+        self.__data.attach(self.__aggregates)
+        self.__due = DueDateIndex()
+        self.__data.attach(self.__due)
+        self.__intervals = RentalIntervals()
+        self.__data.attach(self.__intervals)
+
+        self.__ids = IdAllocator(None if settings.repo_type == "inmemory" else settings.rental_file[1:-1] + ".ids")
+        self.__data.attach(self.__ids)
+
+        self.__table = None
+        if settings.columnar:
+            self.__table = RentalTable()
+            self.__data.attach(self.__table)
 
         self.populate()
 
@@ -27,65 +67,161 @@ class RentalService:
     def data(self):
         return self.__data
 
+    @property
+    def aggregates(self):
+        """
+        Rented days and rental count per movie and per client
+        """
+        return self.__aggregates
+
+    @property
+    def table(self):
+        """
+        Columnar copy of the rentals, None unless enabled in the settings
+        """
+        return self.__table
+
+    @staticmethod
+    def __with_id(r, i_id):
+        return Rental.trusted(i_id, r.movie_id, r.client_id, r.rented_date, r.due_date, r.returned_date)
+
+    def __check_free(self, rentals):
+        """
+        Raises ValueError if a rental meets another rental of its movie, in the repository or among the given ones
+        The rentals in the repository with the ids of the given ones are ignored, as they are being replaced
+        """
+        ids = {r.id for r in rentals}
+        batch = RentalIntervals()
+        for r in rentals:
+            if any(i not in ids for i in self.__intervals.overlapping(r.movie_id, r.rented_date, r.returned_date)) \
+                    or not batch.is_free(r.movie_id, r.rented_date, r.returned_date):
+                raise ValueError("Movie is already rented in that period")
+            batch.add(r)
+
     def add(self, elem):
+        if elem.id == "":
+            elem = RentalService.__with_id(elem, self.__ids.next_id())
+        self.__check_free([elem])
         self.__data.add_element(elem)
+        return elem
 
     def update(self, updated):
+        self.__check_free([updated])
         self.__data[updated.id] = updated
 
     def remove(self, r_id):
         del self.__data[r_id]
 
+    def add_many(self, elems):
+        elems = list(elems)
+        ids = iter(self.__ids.reserve(sum(1 for e in elems if e.id == "")))
+        elems = [RentalService.__with_id(e, next(ids)) if e.id == "" else e for e in elems]
+        self.__check_free(elems)
+        self.__data.add_many(elems)
+        return elems
+
+    def update_many(self, updated):
+        updated = list(updated)
+        self.__check_free(updated)
+        self.__data.update_many(updated)
+
+    def remove_many(self, r_ids):
+        self.__data.delete_many(r_ids)
+
+    def next_id(self):
+        return self.__ids.next_id()
+
+    def reserve(self, n):
+        return self.__ids.reserve(n)
+
     def has_item(self, i_id):
         return self.__data.has_element(i_id)
 
     def return_movie(self, i_id):
-        self.__data[i_id].returned_date = datetime.datetime.today() if self.__data[i_id].returned_date == datetime.datetime.min else self.__data[i_id].returned_date
+        r = self.__data[i_id]
+        if r.returned_date == datetime.datetime.min:
+            self.__data[i_id] = Rental(r.id, r.movie_id, r.client_id, r.rented_date, r.due_date, datetime.datetime.today())
 
     def unreturn_movie(self, i_id):
-        self.__data[i_id].returned_date = datetime.datetime.min if self.__data[i_id].returned_date != datetime.datetime.min else self.__data[i_id].returned_date
+        r = self.__data[i_id]
+        if r.returned_date != datetime.datetime.min:
+            self.update(Rental(r.id, r.movie_id, r.client_id, r.rented_date, r.due_date, datetime.datetime.min))
 
     def list(self):
         return str(self.__data)
 
     def get_movie_rentals(self, m_id):
-        ls = self.__data.values
-        r_list = [x for x in ls if x.movie_id == str(m_id)]
-        return r_list
+        return self.__data.lookup("movie_id", str(m_id))
 
     def get_client_rentals(self, c_id):
-        ls = self.__data.values
-        r_list = [x for x in ls if x.client_id == str(c_id)]
-        return r_list
+        return self.__data.lookup("client_id", str(c_id))
 
     def get_client_passed_rentals(self, c_id):
-        ls = self.__data.values
-        r_list = [x for x in ls if x.client_id == str(c_id) and (x.due_date < datetime.datetime.today() and x.returned_date == datetime.datetime.min)]
-        return r_list
+        if self.__sqlite is not None:
+            # due dates are whole days, due before now is due today at the latest
+            return self.__sqlite.query("client_overdue", str(c_id), datetime.datetime.min.toordinal(),
+                                       datetime.date.today().toordinal() + 1)
+        return [self.__data[i] for due, i in self.__due.client_overdue(str(c_id), datetime.datetime.today())]
+
+    def client_has_overdue(self, c_id):
+        """
+        Function to check whether a client has rentals that passed their due date, as is checked before renting
+        :param c_id: client id
+        :return: True if the client has rentals not returned and due before today
+        """
+        return self.__due.client_has_overdue(str(c_id), datetime.datetime.today())
+
+    def client_overdue_count(self, c_id):
+        """
+        Function to count the rentals of a client that passed their due date
+        :param c_id: client id
+        :return: number of rentals not returned and due before today
+        """
+        return self.__due.client_overdue_count(str(c_id), datetime.datetime.today())
+
+    def is_available(self, m_id, date):
+        """
+        Function to check whether a movie is not rented on a date
+        :param m_id: movie id
+        :param date: the date
+        :return: True if the movie is available
+        """
+        return self.__intervals.is_available(str(m_id), date)
+
+    def get_movies_out(self, date):
+        """
+        Function to find the movies rented on a date
+        :param date: the date
+        :return: list of movie ids
+        """
+        return self.__intervals.movies_out(date)
+
+    def get_overlapping_rentals(self, m_id, rented_date, returned_date):
+        """
+        Function to find the rentals of a movie meeting a period
+        :param m_id: movie id
+        :param rented_date: start of the period
+        :param returned_date: end of the period, datetime.min for no end
+        :return: list of rentals, by rented date
+        """
+        return [self.__data[i] for i in self.__intervals.overlapping(str(m_id), rented_date, returned_date)]
+
+    def get_passed_rentals(self, date):
+        """
+        Function to find the rentals not returned and due before a date
+        :param date: the date
+        :return: list of (due date, rental id), earliest due first
+        """
+        return self.__due.overdue(date)
 
     def search_id(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() == self.__data.data[elem].id.lower():
-                ls.append(self.__data[elem])
-
-        return ls
+        return list(self.__data.scan(fields={"id": s}))
 
     def search_client_id(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() == self.__data.data[elem].client_id.lower():
-                ls.append(self.__data[elem])
-
-        return ls
+        return list(self.__data.scan(fields={"client_id": s}))
 
     def search_movie_id(self, s):
-        ls = []
-        for elem in self.__data.data:
-            if s.lower() == self.__data.data[elem].movie_id.lower():
-                ls.append(self.__data[elem])
-
-        return ls
+        return list(self.__data.scan(fields={"movie_id": s}))
 
     def populate(self):
         random.seed()
@@ -106,9 +242,13 @@ class RentalService:
                       datetime.datetime.strptime('7/3/2005', '%d/%m/%Y'),
                       datetime.datetime.strptime('8/4/2005', '%d/%m/%Y'),
                       datetime.datetime.strptime('9/5/2005', '%d/%m/%Y')]
+        ls = []
+        # a movie each, so no two rentals meet
+        movies = random.sample(range(1, 21), 20)
         for i in range(1, 21):
-            movie = random.randint(1, 20)
+            movie = movies[i - 1]
             client = random.randint(1, 20)
             r = Rental(i, movie, client, random.choice(rent_dates), random.choice(due_dates),
                        random.choice(return_dates))
-            self.add(r)
+            ls.append(r)
+        self.add_many(ls)
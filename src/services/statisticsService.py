@@ -0,0 +1,143 @@
+from src.repository.rentalAggregates import RentalAggregates
+
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+
+
+def _partial(reader, args, cutoff):
+    """
+    Totals per movie and per client and late rentals of a slice of the rentals, run in a worker process
+    :param reader: function giving the rentals of the slice, from Repository.partitions
+    :param args: its arguments
+    :param cutoff: rentals not returned and due before it are late
+    :return: (movie totals, client totals, list of (due date, id, rental) of the late rentals)
+    """
+    movies, clients, late = {}, {}, []
+    rented_days = RentalAggregates.rented_days
+    pending = datetime.datetime.min
+    for r in reader(*args):
+        days = rented_days(r)
+        entry = movies.get(r.movie_id)
+        if entry is None:
+            entry = movies[r.movie_id] = [0, 0]
+        entry[0] += days
+        entry[1] += 1
+        entry = clients.get(r.client_id)
+        if entry is None:
+            entry = clients[r.client_id] = [0, 0]
+        entry[0] += days
+        entry[1] += 1
+        if r.returned_date == pending and r.due_date < cutoff:
+            late.append((r.due_date, r.id, r))
+    return movies, clients, late
+
+
+class StatisticsService:
+    """
+    Statistics service class
+
+    The most rented movies and the most active clients are read a page at a time from the
+    rankings the rental service keeps up to date, and the late rentals from its due date index,
+    without going over the rentals. Days are counted between calendar dates.
+    With workers set, the reports are computed instead by refresh(), in a pass over the
+    rental storage split into slices (shard files, byte ranges of a text file or row ranges)
+    read by up to that many processes, and the partial results are merged.
+    """
+
+    def __init__(self, movie_service, client_service, rental_service, workers=0):
+        self.__movies = movie_service
+        self.__clients = client_service
+        self.__rentals = rental_service
+        self.__workers = workers
+        # results of the last refresh(), with workers set
+        self.__aggregates = None
+        self.__late = None
+
+    @property
+    def workers(self):
+        return self.__workers
+
+    def refresh(self):
+        """
+        Function to compute the reports over the slices of the rental storage, with workers set
+        :return:
+        """
+        if not self.__workers:
+            return
+        today = datetime.datetime.today()
+        cutoff = datetime.datetime(today.year, today.month, today.day)
+        parts = self.__rentals.data.partitions(4 * self.__workers)
+        if self.__workers > 1 and len(parts) > 1:
+            with ProcessPoolExecutor(min(self.__workers, len(parts))) as pool:
+                partials = list(pool.map(_partial, [reader for reader, args in parts],
+                                         [args for reader, args in parts], [cutoff] * len(parts)))
+        else:
+            partials = [_partial(reader, args, cutoff) for reader, args in parts]
+
+        aggregates = RentalAggregates()
+        late = []
+        for movies, clients, rentals in partials:
+            aggregates.add_totals(movies, clients)
+            late.extend(rentals)
+        late.sort(key=lambda x: x[:2])
+        self.__aggregates, self.__late = aggregates, late
+
+    def __source(self):
+        if not self.__workers:
+            return self.__rentals.aggregates
+        if self.__aggregates is None:
+            self.refresh()
+        return self.__aggregates
+
+    @staticmethod
+    def __page(data, ranked):
+        # rentals can refer to ids that are no longer in use
+        return [(data[i], days) for i, days in ranked if data.has_element(i)]
+
+    def most_rented_movies(self, k, offset=0):
+        """
+        Function to read a page of the movies ranked by the days they were rented for
+        Movies without rentals are not ranked
+        :param k: page size
+        :param offset: rank of the first movie, 0 for the most rented one
+        :return: list of (movie, rented days), most rented first
+        """
+        return StatisticsService.__page(self.__movies.data, self.__source().top_movies(k, offset))
+
+    def ranked_movies(self):
+        """
+        Function to count the ranks of most_rented_movies, including the ones of movies no longer in use
+        :return: the number of ranks
+        """
+        return self.__source().ranked_movies()
+
+    def ranked_clients(self):
+        """
+        Function to count the ranks of most_active_clients, including the ones of clients no longer in use
+        :return: the number of ranks
+        """
+        return self.__source().ranked_clients()
+
+    def most_active_clients(self, k, offset=0):
+        """
+        Function to read a page of the clients ranked by the days they rented movies for
+        Clients without rentals are not ranked
+        :param k: page size
+        :param offset: rank of the first client, 0 for the most active one
+        :return: list of (client, rented days), most active first
+        """
+        return StatisticsService.__page(self.__clients.data, self.__source().top_clients(k, offset))
+
+    def late_rentals(self):
+        """
+        Function to rank the rentals not returned by their delay
+        :return: list of (rental, days past the due date), latest first
+        """
+        today = datetime.datetime.today()
+        if self.__workers:
+            self.__source()
+            return [(r, today.toordinal() - due.toordinal()) for due, i, r in self.__late]
+        # due before the start of today, at least a day late
+        late = self.__rentals.get_passed_rentals(datetime.datetime(today.year, today.month, today.day))
+        data = self.__rentals.data
+        return [(data[i], today.toordinal() - due.toordinal()) for due, i in late]
@@ -0,0 +1,113 @@
+import unittest
+
+from src.services.rentalService import RentalService
+from src.services.statisticsService import StatisticsService
+from src.repository.fileRepository import FileRepository
+from src.repository.repository import Repository
+
+from src.domain.client import Client
+from src.domain.movie import Movie
+from src.domain.rental import Rental
+
+from types import SimpleNamespace
+import datetime
+import os
+import tempfile
+
+
+def _settings(repo_type="inmemory"):
+    return SimpleNamespace(repo_type=repo_type, columnar=False, cache_entries=0, cache_bytes=0)
+
+
+def _rentals(rentals):
+    """
+    Rental service holding the given rentals only
+    """
+    s = RentalService(_settings())
+    s.remove_many([r.id for r in s.data.values])
+    s.add_many(rentals)
+    return s
+
+
+class TestRentalService(unittest.TestCase):
+    def test_double_booking(self):
+        day = datetime.datetime(2020, 1, 1)
+        week = datetime.timedelta(days=7)
+        pending = datetime.datetime.min
+        s = RentalService(_settings())
+        # the random rentals made on startup do not meet
+        for r in s.data.values:
+            self.assertEqual([x.id for x in s.get_overlapping_rentals(r.movie_id, r.rented_date, r.returned_date)],
+                             [r.id])
+
+        s.add(Rental(100, 100, 1, day, day + week, day + week))
+        with self.assertRaises(ValueError):
+            s.add(Rental(101, 100, 2, day + datetime.timedelta(days=3), day + week, pending))
+        with self.assertRaises(ValueError):
+            s.add_many([Rental(101, 100, 2, day + week, day + 2 * week, pending),
+                        Rental(102, 100, 3, day + 2 * week, day + 3 * week, day + 3 * week)])
+        self.assertFalse(s.has_item("101"))
+
+        s.add(Rental(101, 100, 2, day + 2 * week, day + 3 * week, day + 3 * week))
+        # moving a rental onto another one, but not onto its own period
+        with self.assertRaises(ValueError):
+            s.update(Rental(101, 100, 2, day + week - datetime.timedelta(days=1), day + 3 * week, day + 3 * week))
+        s.update(Rental(101, 100, 2, day + week, day + 3 * week, day + 3 * week))
+        self.assertEqual(s.data["101"].rented_date, day + week)
+
+        # a rental that is not returned keeps the movie out from then on
+        s.add(Rental(102, 200, 1, day, day + week, day + week))
+        s.add(Rental(103, 200, 2, day + 2 * week, day + 3 * week, pending))
+        with self.assertRaises(ValueError):
+            s.unreturn_movie("102")
+
+
+class TestStatisticsService(unittest.TestCase):
+    def setUp(self):
+        day = datetime.datetime(2020, 1, 1)
+        week = datetime.timedelta(days=7)
+        movies = Repository()
+        movies.add_many(Movie(i, f"Movie {i}", "A movie", "Drama") for i in range(1, 5))
+        clients = Repository()
+        clients.add_many(Client(i, f"Client {i}") for i in range(1, 4))
+        self._rentals = _rentals([Rental(1, 1, 1, day, day + week, day + 10 * week),
+                                  Rental(2, 2, 1, day, day + week, day + week),
+                                  Rental(3, 1, 2, day + 10 * week, day + 11 * week, day + 11 * week),
+                                  Rental(4, 3, 2, day, day + week, datetime.datetime.min),
+                                  # a movie no longer in use
+                                  Rental(5, 9, 3, day, day + week, day + 20 * week)])
+        self._movies = SimpleNamespace(data=movies)
+        self._clients = SimpleNamespace(data=clients)
+
+    def _reports(self, stats):
+        return ([(m.id, days) for m, days in stats.most_rented_movies(10)],
+                [(c.id, days) for c, days in stats.most_active_clients(2)],
+                [(r.id, delay) for r, delay in stats.late_rentals()])
+
+    def test_rankings(self):
+        stats = StatisticsService(self._movies, self._clients, self._rentals)
+        movies, clients, late = self._reports(stats)
+        self.assertEqual(movies, [("1", 77), ("2", 7), ("3", 0)])
+        self.assertEqual(clients, [("3", 140), ("1", 77)])
+        self.assertEqual(late, [("4", datetime.date.today().toordinal() - datetime.date(2020, 1, 8).toordinal())])
+        self.assertEqual([(c.id, days) for c, days in stats.most_active_clients(2, 2)], [("2", 7)])
+        # movie 9 is ranked but no longer in use
+        self.assertEqual((stats.ranked_movies(), stats.ranked_clients()), (4, 3))
+
+    def test_partitions(self):
+        expected = self._reports(StatisticsService(self._movies, self._clients, self._rentals))
+        d = tempfile.TemporaryDirectory()
+        self.addCleanup(d.cleanup)
+        path = os.path.join(d.name, "rentals.txt")
+        rentals = FileRepository(f'"{path}"', Rental)
+        rentals.add_many(self._rentals.data.values)
+        for service in (self._rentals, SimpleNamespace(data=rentals)):
+            for workers in (1, 2):
+                with self.subTest(type(service.data).__name__, workers=workers):
+                    stats = StatisticsService(self._movies, self._clients, service, workers)
+                    stats.refresh()
+                    self.assertEqual(self._reports(stats), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
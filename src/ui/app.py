@@ -1,9 +1,11 @@
 import datetime
 
 from src.repository.repository import RepositoryException
+from src.repository.unitOfWork import UnitOfWork
 from src.services.movieService import MovieService
 from src.services.rentalService import RentalService
 from src.services.clientService import ClientService
+from src.services.statisticsService import StatisticsService
 
 from src.domain.movie import Movie
 from src.domain.rental import Rental
@@ -41,8 +43,12 @@ class AppUI:
         self._movieService = MovieService(settings)
         self._rentalService = RentalService(settings)
         self._clientService = ClientService(settings)
+        self._statisticsService = StatisticsService(self._movieService, self._clientService, self._rentalService,
+                                                    settings.stats_workers)
 
         self._undoService = UndoService()
+        # cascaded deletes write every repository once
+        self._unitOfWork = UnitOfWork(self._movieService.data, self._clientService.data, self._rentalService.data)
 
         self.__state = AppState.MainMenu
 
@@ -122,6 +128,16 @@ class AppUI:
             print("Invalid Command")
             return None
 
+    def print_client_suggestions(self, prefix):
+        """
+        Method printing the clients whose id or name starts with what was typed
+        :param prefix: the typed text
+        :return:
+        """
+        suggestions = self._clientService.suggest(prefix, 5) if prefix else []
+        if suggestions:
+            print("Did you mean: " + ", ".join(f"{x.id} ({x.name})" for x in suggestions))
+
     @staticmethod
     def parse_date(date):
         """
@@ -214,7 +230,7 @@ class AppUI:
                     rental_id = ""
                     ok = False
                     while not ok:
-                        rental_id = input("Enter new rental ID: ")
+                        rental_id = input("Enter new rental ID (empty for the next free one): ")
                         if not self._rentalService.has_item(rental_id):
                             ok = True
                         else:
@@ -237,7 +253,8 @@ class AppUI:
                             ok = True
                         else:
                             print("Invalid Client ID")
-                    if self._rentalService.get_client_passed_rentals(client_id):
+                            self.print_client_suggestions(client_id)
+                    if self._rentalService.client_has_overdue(client_id):
                         raise UIException("Client has rented movies that passed their due date for return")
 
                     rented_date = AppUI.parse_date(input("Enter rented date (DD/MM/YY): "))
@@ -245,12 +262,14 @@ class AppUI:
                     returned_date = AppUI.parse_date(input("Enter returned date (DD/MM/YY) or 'Pending': "))
 
                     r = Rental(rental_id, movie_id, client_id, rented_date, due_date, returned_date)
+                    r = self._rentalService.add(r)
+                    if not rental_id:
+                        print(f"Rental ID: {r.id}")
                     redo = Call(self._rentalService.add, r)
                     undo = Call(self._rentalService.remove, r.id)
 
                     op = Operation(undo, redo)
                     self._undoService.record(op)
-                    self._rentalService.add(r)
                 except ValueError as ve:
                     print(str(ve))
                 except UIException as ue:
@@ -285,6 +304,7 @@ class AppUI:
                         ok = True
                     else:
                         print("Invalid Client ID")
+                        self.print_client_suggestions(client_id)
 
                 rented_date = AppUI.parse_date(input("Enter rented date (DD/MM/YYYY): "))
                 due_date = AppUI.parse_date(input("Enter due date (DD/MM/YYYY): "))
@@ -330,8 +350,8 @@ class AppUI:
                 try:
                     self._rentalService.return_movie(rental_id)
 
-                    undo = Call(self._rentalService.return_movie, rental_id)
-                    redo = Call(self._rentalService.unreturn_movie, rental_id)
+                    undo = Call(self._rentalService.unreturn_movie, rental_id)
+                    redo = Call(self._rentalService.return_movie, rental_id)
 
                     op = Operation(undo, redo)
                     self._undoService.record(op)
@@ -353,7 +373,7 @@ class AppUI:
                 client_id = ""
                 ok = False
                 while not ok:
-                    client_id = input("Enter new client ID: ")
+                    client_id = input("Enter new client ID (empty for the next free one): ")
                     if not self._clientService.has_item(client_id):
                         ok = True
                     else:
@@ -362,7 +382,9 @@ class AppUI:
 
                 try:
                     c = Client(client_id, name)
-                    self._clientService.add(c)
+                    c = self._clientService.add(c)
+                    if not client_id:
+                        print(f"Client ID: {c.id}")
 
                     redo = Call(self._clientService.add, c)
                     undo = Call(self._clientService.remove, c.id)
@@ -383,6 +405,7 @@ class AppUI:
                         ok = True
                     else:
                         print("ID not in use")
+                        self.print_client_suggestions(client_id)
                 name = input("Enter new client name: ")
 
                 try:
@@ -405,17 +428,17 @@ class AppUI:
                     redo = Call(self._clientService.remove, client_id)
                     op = Operation(undo, redo)
 
-                    c_op = CascadedOperation()
+                    c_op = CascadedOperation(self._unitOfWork)
                     c_op.add(op)
-                    self._clientService.remove(client_id)
-                    ls = self.rental_service.get_client_rentals(client_id)
-                    for i in ls:
-                        self.rental_service.remove(i.id)
-                        redo = Call(self.rental_service.remove, i.id)
-                        undo = Call(self.rental_service.add, i)
+                    with self._unitOfWork:
+                        self._clientService.remove(client_id)
+                        ls = self.rental_service.get_client_rentals(client_id)
+                        self.rental_service.remove_many([i.id for i in ls])
 
-                        op = Operation(undo, redo)
-                        c_op.add(op)
+                    redo = Call(self.rental_service.remove_many, [i.id for i in ls])
+                    undo = Call(self.rental_service.add_many, ls)
+                    op = Operation(undo, redo)
+                    c_op.add(op)
 
                     self._undoService.record(c_op)
                 except KeyError:
@@ -439,7 +462,7 @@ class AppUI:
                 movie_id = ""
                 ok = False
                 while not ok:
-                    movie_id = input("Enter new movie ID: ")
+                    movie_id = input("Enter new movie ID (empty for the next free one): ")
                     if not self._movieService.has_item(movie_id):
                         ok = True
                     else:
@@ -450,7 +473,9 @@ class AppUI:
 
                 try:
                     m = Movie(movie_id, title, desc, genre)
-                    self._movieService.add(m)
+                    m = self._movieService.add(m)
+                    if not movie_id:
+                        print(f"Movie ID: {m.id}")
 
                     redo = Call(self._movieService.add, m)
                     undo = Call(self._movieService.remove, m.id)
@@ -494,17 +519,17 @@ class AppUI:
                     redo = Call(self._movieService.remove, movie_id)
                     op = Operation(undo, redo)
 
-                    c_op = CascadedOperation()
+                    c_op = CascadedOperation(self._unitOfWork)
                     c_op.add(op)
-                    self._movieService.remove(movie_id)
-                    ls = self.rental_service.get_movie_rentals(movie_id)
-                    for i in ls:
-                        self.rental_service.remove(i.id)
-                        redo = Call(self.rental_service.remove, i.id)
-                        undo = Call(self.rental_service.add, i)
+                    with self._unitOfWork:
+                        self._movieService.remove(movie_id)
+                        ls = self.rental_service.get_movie_rentals(movie_id)
+                        self.rental_service.remove_many([i.id for i in ls])
 
-                        op = Operation(undo, redo)
-                        c_op.add(op)
+                    redo = Call(self.rental_service.remove_many, [i.id for i in ls])
+                    undo = Call(self.rental_service.add_many, ls)
+                    op = Operation(undo, redo)
+                    c_op.add(op)
 
                     self._undoService.record(c_op)
                 except KeyError:
@@ -603,6 +628,38 @@ class AppUI:
             case _:  # Wildcard
                 raise UIException("Unrecognised Command")
 
+    PAGE_SIZE = 10
+
+    @staticmethod
+    def print_pages(read_page, form, ranks):
+        """
+        Static method printing a ranking a page at a time, as long as the user asks for more
+        :param read_page: function giving the (element, value) pairs of a page from its size and offset
+        :param form: function giving the printed form of a pair
+        :param ranks: number of ranks, a page can hold fewer pairs when elements are no longer in use
+        :return:
+        """
+        offset = 0
+        while True:
+            page = read_page(AppUI.PAGE_SIZE, offset)
+            s = ""
+            for e in page:
+                s += form(e)
+            print(s)
+            offset += AppUI.PAGE_SIZE
+            if offset >= ranks or input("Press enter for the next page, anything else to stop: ") != "":
+                break
+
+    @staticmethod
+    def movie_days_form(e):
+        return f"Title: {e[0].title}\n" \
+               f"Rented Days: {e[1]}\n\n"
+
+    @staticmethod
+    def client_days_form(e):
+        return f"Name: {e[0].name}\n" \
+               f"Rented Days: {e[1]}\n\n"
+
     @classmethod
     def print_stat_menu(cls):
         print("1. Most Rented Movies")
@@ -611,57 +668,25 @@ class AppUI:
         print("4. Back")
 
     def process_stat_menu(self, command):
+        if command in (1, 2, 3):
+            self._statisticsService.refresh()
         match command:
             case 1:  # Movie
-                ls = []
-                for x in self._movieService.data.data:
-                    tls = self._rentalService.get_movie_rentals(x.id)
-                    s = 0
-                    for e in tls:
-                        if e.returned_date != datetime.datetime.min:
-                            s += e.rented_days
-                    ls.append((x.title, s))
-
-                    ls.sort(reverse=True, key=AppUI.sort_movies)
-
-                s = ""
-                for e in ls:
-                    s += f"Title: {e[0]}\n" \
-                         f"Rented Days: {e[1]}\n\n"
-                print(s)
+                AppUI.print_pages(self._statisticsService.most_rented_movies, AppUI.movie_days_form,
+                                  self._statisticsService.ranked_movies())
 
             case 2:  # Client
-                ls = []
-                for x in self._clientService.data.data:
-                    tls = self._rentalService.get_client_rentals(x.id)
-                    s = 0
-                    for e in tls:
-                        if e.returned_date != datetime.datetime.min:
-                            s += e.rented_days
-                    ls.append((x.name, s))
-
-                    ls.sort(reverse=True, key=AppUI.sort_clients)
-
-                s = ""
-                for e in ls:
-                    s += f"Name: {e[0]}\n" \
-                         f"Rented Days: {e[1]}\n\n"
-                print(s)
+                AppUI.print_pages(self._statisticsService.most_active_clients, AppUI.client_days_form,
+                                  self._statisticsService.ranked_clients())
             case 3:  # Rental
-                lst = []
-                for x in self._clientService.data.data:
-                    lst.extend(self._rentalService.get_client_passed_rentals(x.id))
-
-                lst.sort(reverse=True, key=AppUI.sort_rentals)
-
                 s = ""
-                for e in lst:
+                for e, delay in self._statisticsService.late_rentals():
                     s += f"ID: {e.id}\n" \
                          f"Client: {e.client_id}\n" \
                          f"Movie: {e.movie_id}\n" \
                          f"Rented Date: {e.rented_date.strftime('%d/%m/%Y')}\n" \
                          f"Due Date: {e.due_date.strftime('%d/%m/%Y')}\n"
-                    s += f"Delay: {e.rented_days}\n\n"
+                    s += f"Delay: {delay}\n\n"
 
                 print(s)
             case 4:  # Exit
@@ -669,18 +694,6 @@ class AppUI:
             case _:  # Wildcard
                 raise UIException("Unrecognised Command")
 
-    @staticmethod
-    def sort_rentals(e):
-        return e.rented_days
-
-    @staticmethod
-    def sort_movies(e):
-        return e[1]
-
-    @staticmethod
-    def sort_clients(e):
-        return e[1]
-
 
 class App:
     """
@@ -1,7 +1,41 @@
 class Settings:
     def __init__(self):
+        self._properties = {}
         with open("settings.properties", "r") as f:
-            self.repo_type = f.readline().strip().split(" ")[2]
-            self.movies_file = f.readline().strip().split(" ")[2]
-            self.client_file = f.readline().strip().split(" ")[2]
-            self.rental_file = f.readline().strip().split(" ")[2]
+            for line in f:
+                line = line.strip()
+                if line == "" or line.startswith("#"):
+                    continue
+                key, value = line.split("=", 1)
+                self._properties[key.strip()] = value.strip()
+
+        self.repo_type = self._properties["repository"]
+        self.movies_file = self._properties["movies"]
+        self.client_file = self._properties["clients"]
+        self.rental_file = self._properties["rentals"]
+
+        # file repository caching: "direct" reads and writes the file on every call,
+        # "writeback" keeps the file loaded and flushes it on flush_ops / flush_interval / exit
+        self.file_mode = self._properties.get("file_mode", "direct")
+        self.flush_ops = int(self._properties.get("flush_ops", "0"))
+        self.flush_interval = float(self._properties.get("flush_interval", "0"))
+
+        # journal repository: compact once the journal reaches this many bytes / records per element
+        self.journal_compact_size = int(self._properties.get("journal_compact_size", "1048576"))
+        self.journal_compact_ratio = float(self._properties.get("journal_compact_ratio", "1.0"))
+
+        # sharded repository: number of shard files per entity and of processes loading them
+        self.shards = int(self._properties.get("shards", "8"))
+        self.shard_workers = int(self._properties.get("shard_workers", "1"))
+
+        # read-through cache in front of the disk repositories, at most this many elements / bytes, 0 for no limit
+        # the cache is off when both are 0
+        self.cache_entries = int(self._properties.get("cache_entries", "0"))
+        self.cache_bytes = int(self._properties.get("cache_bytes", "0"))
+
+        # processes computing the statistics over slices of the rental storage on every report,
+        # 0 reads them from the structures kept up to date as rentals change
+        self.stats_workers = int(self._properties.get("stats_workers", "0"))
+
+        # keep a columnar copy of the rentals, RentalService.table, updated on every change (off by default)
+        self.columnar = self._properties.get("columnar", "false").lower() == "true"
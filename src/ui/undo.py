@@ -51,16 +51,30 @@ class Operation:
 
 class CascadedOperation:
 
-    def __init__(self):
+    def __init__(self, unit_of_work=None):
+        """
+        :param unit_of_work: optional UnitOfWork, undo and redo then run in one transaction over its repositories
+        """
         self._operations = []
+        self._unit_of_work = unit_of_work
 
     def add(self, operation):
         self._operations.append(operation)
 
     def undo(self):
-        for op in self._operations:
-            op.undo()
+        if self._unit_of_work is None:
+            for op in self._operations:
+                op.undo()
+            return
+        with self._unit_of_work:
+            for op in self._operations:
+                op.undo()
 
     def redo(self):
-        for op in self._operations:
-            op.redo()
+        if self._unit_of_work is None:
+            for op in self._operations:
+                op.redo()
+            return
+        with self._unit_of_work:
+            for op in self._operations:
+                op.redo()